@@ -11,31 +11,135 @@ It parses authoritative sources by scanning vLLM native extension registration s
 It also scans Python for torch.ops usage to help reconcile what is *used* from Python
 versus what is *registered* by vLLM itself.
 
-Output is Markdown.
+Output is Markdown by default; --format json|ndjson writes a reloadable Catalog that can be
+rendered to Markdown later (--from-catalog) without rescanning.
 """
 
 from __future__ import annotations
 
 import argparse
+import ast
+import bisect
+import hashlib
+import json
+import mmap
+import os
 import re
-from dataclasses import dataclass
+import sqlite3
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 
+from git_batch import GitBatch
 
-_PY_OP_RE = re.compile(r"\btorch\.ops\.(?P<ns>[A-Za-z0-9_]+)\.(?P<op>[A-Za-z0-9_]+)\b")
+
+# All scanning regexes work on bytes so files can be searched in place (mmap) and only the
+# small matched regions get decoded.
+_PY_OP_RE = re.compile(rb"\btorch\.ops\.(?P<ns>[A-Za-z0-9_]+)\.(?P<op>[A-Za-z0-9_]+)\b")
 
 _TORCH_LIBRARY_RE = re.compile(
-    r"\bTORCH_LIBRARY\s*\(\s*(?P<ns>[A-Za-z0-9_]+)\s*,\s*(?P<var>[A-Za-z0-9_]+)\s*\)"
+    rb"\bTORCH_LIBRARY\s*\(\s*(?P<ns>[A-Za-z0-9_]+)\s*,\s*(?P<var>[A-Za-z0-9_]+)\s*\)"
 )
 _TORCH_LIBRARY_FRAGMENT_RE = re.compile(
-    r"\bTORCH_LIBRARY_FRAGMENT\s*\(\s*(?P<ns>[A-Za-z0-9_]+)\s*,\s*(?P<var>[A-Za-z0-9_]+)\s*\)"
+    rb"\bTORCH_LIBRARY_FRAGMENT\s*\(\s*(?P<ns>[A-Za-z0-9_]+)\s*,\s*(?P<var>[A-Za-z0-9_]+)\s*\)"
 )
 _TORCH_LIBRARY_IMPL_RE = re.compile(
-    r"\bTORCH_LIBRARY_IMPL\s*\(\s*(?P<ns>[A-Za-z0-9_]+)\s*,\s*(?P<key>[^,\)]+)\s*,\s*(?P<var>[A-Za-z0-9_]+)\s*\)"
+    rb"\bTORCH_LIBRARY_IMPL\s*\(\s*(?P<ns>[A-Za-z0-9_]+)\s*,\s*(?P<key>[^,\)]+)\s*,\s*(?P<var>[A-Za-z0-9_]+)\s*\)"
+)
+
+_TORCH_LIBRARY_EXPAND_TOKEN = b"TORCH_LIBRARY_EXPAND"
+_TORCH_LIBRARY_IMPL_EXPAND_TOKEN = b"TORCH_LIBRARY_IMPL_EXPAND"
+
+# Cheap substring prefilters: files without these never reach the lexer/regexes.
+_CPP_PREFILTER = b"TORCH_LIBRARY"
+_PY_PREFILTER = b"torch.ops"
+
+# One alternation covering everything the lexer must step over (comments, string/char
+# literals including raw strings, #define bodies) plus the brackets it pairs up, and the
+# conditional-compilation directives whose nesting it tracks.
+_CPP_TOKEN_RE = re.compile(
+    rb"""
+      (?P<line_comment>//[^\n]*)
+    | (?P<block_comment>/\*.*?(?:\*/|\Z))
+    | (?P<define>^[ \t]*\#[ \t]*define\b(?:\\\n|[^\n])*)
+    | (?P<directive>^[ \t]*\#[ \t]*(?P<pp>ifdef|ifndef|if|elif|else|endif)\b(?P<pp_expr>(?:\\\n|[^\n])*))
+    | (?P<raw_string>(?<![A-Za-z0-9_])(?:u8|[uUL])?R"(?P<delim>[^()\\\s"]{0,16})\(.*?(?:\)(?P=delim)"|\Z))
+    | (?P<string>(?:(?<![A-Za-z0-9_])(?:u8|[uUL]))?"(?:\\.|[^"\\\n])*"?)
+    | (?P<char>(?:(?<![A-Za-z0-9_])(?:u8|[uUL])|(?<![A-Za-z0-9_]))'(?:\\.|[^'\\\n])+')
+    | (?P<bracket>[{}()])
+    """,
+    re.VERBOSE | re.DOTALL | re.MULTILINE,
+)
+
+_MACRO_ARG_SPLIT_RE = re.compile(rb"[,({]")
+
+_DEF_RE_TEMPLATE = rb"\b{var}\s*\.def\(\s*(?:TORCH_SELECTIVE_SCHEMA\s*\(\s*)?\"(?P<sig>[^\"]+)\""
+_IMPL_RE_TEMPLATE = rb"\b{var}\s*\.impl\s*(?P<paren>\()\s*\"(?P<op>[^\"]+)\""
+
+# `.def(schema, fn)` and `.impl(name, fn)` without a key register a catch-all kernel, which
+# the dispatcher treats as CompositeImplicitAutograd.
+_IMPLICIT_DISPATCH_KEY = "CompositeImplicitAutograd"
+_DISPATCH_KEY_RE = re.compile(r"(?:\w+::)*(?:DispatchKey::)?k?(?P<key>[A-Z]\w*)$")
+_DISPATCH_CALL_RE = re.compile(r"^(?:\w+::)*dispatch\s*\(\s*(?P<key>[^,]+),")
+# Column order for the dispatch-key matrix; other keys follow alphabetically.
+_DISPATCH_KEY_ORDER = (
+    "CompositeImplicitAutograd",
+    "CompositeExplicitAutograd",
+    "CPU",
+    "CUDA",
+    "Meta",
 )
 
-_TORCH_LIBRARY_EXPAND_TOKEN = "TORCH_LIBRARY_EXPAND"
+# Bump whenever parsing logic changes in a way the regexes below don't capture; cached
+# per-file results from older extractor versions are then discarded.
+_CACHE_SCHEMA = 7
+
+_DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[1] / ".cache"
+
+# Python modules whose functions wrap torch.ops calls; most of vLLM calls these instead of
+# torch.ops directly, so the AST resolver attributes their callers to the wrapped ops.
+_WRAPPER_MODULES = ("vllm._custom_ops", "vllm._aiter_ops")
+
+# Both `torch.ops` and `_custom_ops`/`_aiter_ops` imports contain this; anything else has
+# nothing for the AST resolver to find.
+_AST_PREFILTER = b"ops"
+
+# Tokens of a `#if` expression; anything else (e.g. `<` `>` of __has_include(<x.h>)) is
+# kept as a single-character token so function-like macro arguments can be skipped.
+_PP_TOKEN_RE = re.compile(
+    r"\s*(?:(?P<num>0[xX][0-9A-Fa-f]+|\d+)[uUlL]*|(?P<id>[A-Za-z_]\w*)"
+    r"|(?P<op>&&|\|\||==|!=|<=|>=|<<|>>|[-+*/%<>!~&|^?:(),])|(?P<other>\S))"
+)
+_PP_ATOM_RE = re.compile(r"!?\s*(?:defined\s*\(\s*\w+\s*\)|defined\s+\w+|\w+)")
+
+# Binary operators of `#if` expressions and their precedence (higher binds tighter).
+_PP_BINARY_OPS = {
+    "||": (1, lambda a, b: int(bool(a) or bool(b))),
+    "&&": (2, lambda a, b: int(bool(a) and bool(b))),
+    "|": (3, lambda a, b: a | b),
+    "^": (4, lambda a, b: a ^ b),
+    "&": (5, lambda a, b: a & b),
+    "==": (6, lambda a, b: int(a == b)),
+    "!=": (6, lambda a, b: int(a != b)),
+    "<": (7, lambda a, b: int(a < b)),
+    ">": (7, lambda a, b: int(a > b)),
+    "<=": (7, lambda a, b: int(a <= b)),
+    ">=": (7, lambda a, b: int(a >= b)),
+    "<<": (8, lambda a, b: a << b),
+    ">>": (8, lambda a, b: a >> b),
+    "+": (9, lambda a, b: a + b),
+    "-": (9, lambda a, b: a - b),
+    "*": (10, lambda a, b: a * b),
+    "/": (10, lambda a, b: int(a / b) if b else 0),
+    "%": (10, lambda a, b: a % b if b else 0),
+}
+
+# Identifies serialized catalogs (JSON/NDJSON); bump on incompatible layout changes.
+CATALOG_FORMAT = "vllm-custom-ops-catalog"
+CATALOG_VERSION = 1
 
 
 @dataclass(frozen=True)
@@ -43,6 +147,24 @@ class CppOp:
     ns: str
     name: str
     file: str
+    # Location of the `.def(` call: byte offset into the file and 1-based line.
+    offset: int = -1
+    line: int = 0
+    # Preprocessor condition the `.def(` sits under (e.g. "!defined(USE_ROCM)"); "" if none.
+    guard: str = ""
+
+
+@dataclass(frozen=True)
+class CppImpl:
+    """A kernel registered for an op under one dispatch key (`.impl(...)` or `.def(schema, fn)`)."""
+
+    ns: str
+    name: str
+    key: str
+    file: str
+    offset: int = -1
+    line: int = 0
+    guard: str = ""
 
 
 @dataclass(frozen=True)
@@ -52,76 +174,680 @@ class CppBindingBlock:
     file: str
     start: int
     end: int
+    # Dispatch key of a TORCH_LIBRARY_IMPL* block; "" for TORCH_LIBRARY / _FRAGMENT blocks.
+    key: str = ""
 
 
-def _read_text(path: Path) -> str:
-    return path.read_text(encoding="utf-8", errors="replace")
+@dataclass
+class CppLex:
+    """Result of a single lexing pass over a C++ source file.
+
+    mask[i] is 1 when byte i is code (not inside a comment, string/char literal or #define
+    body). match maps every balanced `{`/`(` offset to its closing offset, and opens keeps
+    the sorted offsets of code `{` and `(` so "next bracket after X" is a bisect.
+    guard_starts/guards record the `#if` condition in force from each offset on, so the
+    condition at any position is also a bisect.
+    """
 
+    mask: bytearray
+    match: dict[int, int]
+    opens: dict[bytes, list[int]]
+    guard_starts: list[int] = field(default_factory=lambda: [0])
+    guards: list[str] = field(default_factory=lambda: [""])
 
-def _strip_cpp_comments_and_track_strings(text: str, i: int) -> int:
-    """Advance index i over comments/strings; return new i.
+    def is_code(self, i: int) -> bool:
+        return 0 <= i < len(self.mask) and self.mask[i] == 1
 
-    This is used by brace matching to reduce false matches.
+    def next_open(self, ch: bytes, pos: int) -> int | None:
+        offsets = self.opens[ch]
+        k = bisect.bisect_left(offsets, pos)
+        return offsets[k] if k < len(offsets) else None
+
+    def guard_at(self, pos: int) -> str:
+        return self.guards[bisect.bisect_right(self.guard_starts, pos) - 1]
+
+
+def _pp_wrapped(expr: str) -> bool:
+    """True if expr is one parenthesised group, e.g. "(A || B)" but not "(A) || (B)"."""
+
+    if not expr.startswith("("):
+        return False
+    depth = 0
+    for i, ch in enumerate(expr):
+        depth += {"(": 1, ")": -1}.get(ch, 0)
+        if depth == 0:
+            return i == len(expr) - 1
+    return False
+
+
+def _pp_negate(expr: str) -> str:
+    if _PP_ATOM_RE.fullmatch(expr):
+        return expr[1:].lstrip() if expr.startswith("!") else f"!{expr}"
+    return f"!{expr}" if _pp_wrapped(expr) else f"!({expr})"
+
+
+def _pp_conjoin(terms: list[str]) -> str:
+    """Join conditions with &&, parenthesising only terms with a lower-precedence operator."""
+
+    def needs_parens(term: str) -> bool:
+        top = term
+        while True:
+            flat = re.sub(r"\([^()]*\)", "", top)
+            if flat == top:
+                return "||" in flat or "?" in flat
+            top = flat
+
+    if len(terms) == 1:
+        return terms[0]
+    return " && ".join(f"({t})" if needs_parens(t) else t for t in terms)
+
+
+def _pp_condition(directive: str, raw: bytes) -> str:
+    expr = re.sub(rb"/\*.*?\*/|//.*", b"", raw.replace(b"\\\n", b" "), flags=re.DOTALL)
+    text = " ".join(_decode(expr).split())
+    if directive == "ifdef":
+        return f"defined({text})"
+    if directive == "ifndef":
+        return f"!defined({text})"
+    return text
+
+
+class _GuardStack:
+    """Nesting of #if/#elif/#else/#endif, rendered as one C expression per region."""
+
+    def __init__(self) -> None:
+        # One frame per open #if: conditions of the branches taken so far, current last.
+        self.frames: list[list[str]] = []
+        # For #else the current branch has no condition of its own.
+        self.in_else: list[bool] = []
+
+    def apply(self, directive: str, raw: bytes) -> None:
+        if directive in ("if", "ifdef", "ifndef"):
+            self.frames.append([_pp_condition(directive, raw)])
+            self.in_else.append(False)
+        elif not self.frames:
+            # Stray #elif/#else/#endif (e.g. the file starts mid-condition); ignore.
+            return
+        elif directive == "elif":
+            self.frames[-1].append(_pp_condition(directive, raw))
+        elif directive == "else":
+            self.in_else[-1] = True
+        else:
+            self.frames.pop()
+            self.in_else.pop()
+
+    def current(self) -> str:
+        terms: list[str] = []
+        for conds, in_else in zip(self.frames, self.in_else):
+            prior = conds if in_else else conds[:-1]
+            terms.extend(_pp_negate(c) for c in prior)
+            if not in_else:
+                terms.append(conds[-1])
+        return _pp_conjoin(terms) if terms else ""
+
+
+def lex_cpp(buf: bytes | mmap.mmap) -> CppLex:
+    mask = bytearray(b"\x01") * len(buf)
+    match: dict[int, int] = {}
+    opens: dict[bytes, list[int]] = {b"{": [], b"(": []}
+    stacks: dict[bytes, list[int]] = {b"{": [], b"(": []}
+    closers = {b"}": b"{", b")": b"("}
+    guard_starts = [0]
+    guards = [""]
+    conditions = _GuardStack()
+
+    for m in _CPP_TOKEN_RE.finditer(buf):
+        kind = m.lastgroup
+        start, end = m.span()
+        if kind == "directive":
+            mask[start:end] = bytes(end - start)
+            conditions.apply(_decode(m.group("pp")), m.group("pp_expr"))
+            guard = conditions.current()
+            if guard != guards[-1]:
+                guard_starts.append(end)
+                guards.append(guard)
+        elif kind == "bracket":
+            ch = m.group(kind)
+            if ch in stacks:
+                stacks[ch].append(start)
+                opens[ch].append(start)
+            else:
+                stack = stacks[closers[ch]]
+                # Unbalanced closers (e.g. from macros) are ignored rather than fatal.
+                if stack:
+                    match[stack.pop()] = start
+        else:
+            mask[start:end] = bytes(end - start)
+
+    return CppLex(mask=mask, match=match, opens=opens, guard_starts=guard_starts, guards=guards)
+
+
+class _PPExpr:
+    """Evaluator for `#if` expressions against a set of predefined macros.
+
+    Follows the preprocessor's rules where they matter here: unknown identifiers are 0,
+    `defined X` / `defined(X)` test membership, and function-like macros that are not
+    defined (e.g. __has_include(...)) evaluate to 0.
     """
 
-    n = len(text)
-    if i >= n:
-        return i
+    def __init__(self, expr: str, defines: dict[str, int]):
+        self.tokens = [m.group().strip() for m in _PP_TOKEN_RE.finditer(expr) if m.group().strip()]
+        self.pos = 0
+        self.defines = defines
+
+    def _peek(self) -> str | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _take(self, expected: str | None = None) -> str:
+        tok = self._peek()
+        if tok is None or (expected is not None and tok != expected):
+            raise ValueError(f"expected {expected or 'a token'}, got {tok!r}")
+        self.pos += 1
+        return tok
+
+    def evaluate(self) -> int:
+        value = self._ternary()
+        if self._peek() is not None:
+            raise ValueError(f"trailing token {self._peek()!r}")
+        return value
+
+    def _ternary(self) -> int:
+        cond = self._binary(1)
+        if self._peek() != "?":
+            return cond
+        self._take("?")
+        then = self._ternary()
+        self._take(":")
+        other = self._ternary()
+        return then if cond else other
+
+    def _binary(self, min_prec: int) -> int:
+        left = self._unary()
+        while True:
+            tok = self._peek()
+            op = _PP_BINARY_OPS.get(tok or "")
+            if op is None or op[0] < min_prec:
+                return left
+            self._take()
+            left = op[1](left, self._binary(op[0] + 1))
+
+    def _unary(self) -> int:
+        tok = self._take()
+        if tok == "!":
+            return int(not self._unary())
+        if tok == "~":
+            return ~self._unary()
+        if tok == "-":
+            return -self._unary()
+        if tok == "+":
+            return self._unary()
+        if tok == "(":
+            value = self._ternary()
+            self._take(")")
+            return value
+        if tok == "defined":
+            if self._peek() == "(":
+                self._take("(")
+                name = self._take()
+                self._take(")")
+            else:
+                name = self._take()
+            return int(name in self.defines)
+        if tok[0].isdigit():
+            return int(re.match(r"0[xX][0-9A-Fa-f]+|\d+", tok).group(), 0)
+        if tok[0].isalpha() or tok[0] == "_":
+            if self._peek() == "(" and tok not in self.defines:
+                depth = 0
+                while True:
+                    t = self._take()
+                    depth += {"(": 1, ")": -1}.get(t, 0)
+                    if depth == 0:
+                        break
+                return 0
+            return int(self.defines.get(tok, 0))
+        raise ValueError(f"unexpected token {tok!r}")
+
+
+def eval_pp_condition(expr: str, defines: dict[str, int]) -> bool | None:
+    """Evaluate a CppOp.guard for one configuration; None if it can't be parsed."""
+
+    if not expr:
+        return True
+    try:
+        return bool(_PPExpr(expr, defines).evaluate())
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+@dataclass(frozen=True)
+class Platform:
+    """A build configuration: predefined macros plus the native sources it compiles."""
+
+    name: str
+    defines: dict[str, int]
+    # Path prefixes (repo-relative) the platform's extensions are built from / never built from.
+    include: tuple[str, ...] = ("csrc/",)
+    exclude: tuple[str, ...] = ()
+
+    def builds(self, rel: str) -> bool:
+        return rel.startswith(self.include) and not rel.startswith(self.exclude)
+
+    def has(self, op: CppOp) -> bool | None:
+        if not self.builds(op.file):
+            return False
+        return eval_pp_condition(op.guard, self.defines)
+
+
+# Approximations of vLLM's CMake configurations (newest supported arch, all optional kernels
+# on). Extend or override per run with `name+MACRO[=VALUE]`.
+PLATFORMS: dict[str, Platform] = {
+    p.name: p
+    for p in (
+        Platform(
+            "cuda",
+            {
+                "__CUDACC__": 1,
+                "CUDA_VERSION": 12080,
+                "ENABLE_FP8": 1,
+                "ENABLE_SCALED_MM_SM90": 1,
+                "ENABLE_SCALED_MM_SM100": 1,
+                "ENABLE_NVFP4_SM100": 1,
+                "ENABLE_CUTLASS_MOE_SM90": 1,
+            },
+            exclude=("csrc/cpu/", "csrc/rocm/"),
+        ),
+        Platform(
+            "rocm",
+            {"USE_ROCM": 1, "__HIPCC__": 1, "__HIP_PLATFORM_AMD__": 1, "ENABLE_FP8": 1},
+            exclude=("csrc/cpu/",),
+        ),
+        Platform(
+            "cpu-avx512",
+            {"__x86_64__": 1, "__AVX2__": 1, "__AVX512F__": 1, "__AVX512BF16__": 1, "__AVX512VNNI__": 1},
+            include=("csrc/cpu/",),
+        ),
+        Platform("cpu-avx2", {"__x86_64__": 1, "__AVX2__": 1}, include=("csrc/cpu/",)),
+        Platform(
+            "cpu-arm",
+            {"__aarch64__": 1, "__ARM_NEON": 1, "__ARM_NEON__": 1},
+            include=("csrc/cpu/",),
+        ),
+    )
+}
+
+
+def parse_platform(spec: str) -> Platform:
+    """`cuda`, or a variant such as `cuda+ENABLE_NVFP4_SM100=0+MY_FLAG`."""
+
+    base, *extra = spec.strip().split("+")
+    if base not in PLATFORMS:
+        raise ValueError(f"Unknown platform {base!r} (known: {', '.join(PLATFORMS)})")
+    platform = PLATFORMS[base]
+    if not extra:
+        return platform
+    defines = dict(platform.defines)
+    for item in extra:
+        name, _, value = item.partition("=")
+        if not re.fullmatch(r"[A-Za-z_]\w*", name):
+            raise ValueError(f"Bad macro in platform spec {spec!r}: {item!r}")
+        if value.strip().lower() in ("undef", "-"):
+            defines.pop(name, None)
+        else:
+            defines[name] = int(value, 0) if value else 1
+    return Platform(spec.strip(), defines, platform.include, platform.exclude)
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace")
+
+
+@contextmanager
+def _mapped(src: str | bytes):
+    """Yield a read-only buffer for a file path (memory-mapped) or pass bytes through."""
+
+    if isinstance(src, bytes):
+        yield src
+        return
+    with open(src, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped.
+            yield b""
+            return
+        with mm:
+            yield mm
+
+
+def _blob_id(data: bytes | mmap.mmap) -> str:
+    # Same digest git uses for blob objects, so cache entries line up with `git ls-tree` ids.
+    h = hashlib.sha1(b"blob %d\0" % len(data))
+    h.update(data)
+    return h.hexdigest()
+
+
+def _cache_slug(repo: Path) -> str:
+    return f"{repo.name}-{hashlib.sha1(str(repo).encode()).hexdigest()[:12]}"
 
-    ch = text[i]
 
-    if ch == '"':
-        i += 1
-        while i < n:
-            if text[i] == "\\":
-                i += 2
+def _identity_matches(
+    entry_size: int | None,
+    entry_mtime_ns: int | None,
+    entry_blob: str | None,
+    size: int,
+    mtime_ns: int | None,
+    blob: str | None,
+    read_bytes,
+) -> bool:
+    """Decide whether a previously scanned file is unchanged.
+
+    When the blob id is known up front (git object store) it decides directly; otherwise a
+    size/mtime match is trusted and read_bytes() is only called to hash same-size files.
+    """
+
+    if entry_size != size:
+        return False
+    if blob is not None:
+        return entry_blob == blob
+    if mtime_ns is not None and entry_mtime_ns == mtime_ns:
+        return True
+    # Same size, different mtime: fall back to comparing content.
+    return read_bytes is not None and _blob_id(read_bytes()) == entry_blob
+
+
+class _LineCounter:
+    """Map increasing byte offsets to 1-based line numbers in one forward pass."""
+
+    def __init__(self, buf: bytes | mmap.mmap):
+        self.buf = buf
+        self.pos = 0
+        self.line = 1
+
+    def line_at(self, offset: int) -> int:
+        if offset < self.pos:
+            self.pos, self.line = 0, 1
+        self.line += self.buf[self.pos : offset].count(b"\n")
+        self.pos = offset
+        return self.line
+
+
+def _cache_version() -> str:
+    h = hashlib.sha1(str(_CACHE_SCHEMA).encode())
+    for pattern in (
+        _PY_OP_RE.pattern,
+        _TORCH_LIBRARY_RE.pattern,
+        _TORCH_LIBRARY_FRAGMENT_RE.pattern,
+        _TORCH_LIBRARY_IMPL_RE.pattern,
+        _TORCH_LIBRARY_EXPAND_TOKEN,
+        _TORCH_LIBRARY_IMPL_EXPAND_TOKEN,
+        _DEF_RE_TEMPLATE,
+        _IMPL_RE_TEMPLATE,
+        _CPP_TOKEN_RE.pattern,
+    ):
+        h.update(b"\0" + pattern)
+    return h.hexdigest()[:16]
+
+
+class ParseCache:
+    """On-disk cache of per-file scan results, keyed by repo-relative path.
+
+    An entry is reused when the file's size and mtime are unchanged; if only the mtime moved
+    (checkout, touch, rebase) the content hash decides. Entries for files that are no longer
+    scanned are evicted on save, and the whole cache is dropped when the extractor's regexes
+    (or `_CACHE_SCHEMA`) change.
+    """
+
+    def __init__(self, path: Path, repo: Path):
+        self.path = path
+        self.repo = str(repo)
+        self.version = _cache_version()
+        self._files: dict[str, dict[str, dict]] = {}
+        self._live: dict[str, set[str]] = {}
+        self._dirty = False
+
+    @classmethod
+    def for_repo(cls, cache_dir: Path, repo: Path) -> ParseCache:
+        cache = cls(cache_dir / f"custom-ops-{_cache_slug(repo)}.json", repo)
+        cache.load()
+        return cache
+
+    def load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != self.version:
+            return
+        if data.get("repo") != self.repo or not isinstance(data.get("files"), dict):
+            return
+        self._files = data["files"]
+
+    def lookup(
+        self,
+        kind: str,
+        rel: str,
+        size: int,
+        mtime_ns: int | None = None,
+        blob: str | None = None,
+        read_bytes=None,
+    ) -> tuple[bool, object]:
+        """Return (hit, cached result) for a file identified by size plus mtime and/or blob id."""
+
+        self._live.setdefault(kind, set()).add(rel)
+        entry = self._files.get(kind, {}).get(rel)
+        if entry is None:
+            return False, None
+        if not _identity_matches(
+            entry.get("size"), entry.get("mtime_ns"), entry.get("blob"), size, mtime_ns, blob, read_bytes
+        ):
+            return False, None
+        if mtime_ns is not None and entry.get("mtime_ns") != mtime_ns:
+            entry["mtime_ns"] = mtime_ns
+            self._dirty = True
+        return True, entry.get("result")
+
+    def store(
+        self, kind: str, rel: str, size: int, mtime_ns: int | None, blob: str, result: object
+    ) -> None:
+        self._files.setdefault(kind, {})[rel] = {
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "blob": blob,
+            "result": result,
+        }
+        self._dirty = True
+
+    def save(self) -> None:
+        # Evict entries for files that were not part of this scan (deleted or moved). Kinds
+        # that were not scanned at all this run (e.g. "ast" without --resolve-calls) are kept.
+        for kind in list(self._files):
+            if kind not in self._live:
                 continue
-            if text[i] == '"':
-                return i + 1
-            i += 1
-        return i
-
-    if ch == "/" and i + 1 < n:
-        nxt = text[i + 1]
-        if nxt == "/":
-            i += 2
-            while i < n and text[i] != "\n":
-                i += 1
-            return i
-        if nxt == "*":
-            i += 2
-            while i + 1 < n:
-                if text[i] == "*" and text[i + 1] == "/":
-                    return i + 2
-                i += 1
-            return i
-
-    return i
-
-
-def _find_matching_brace(text: str, open_brace_index: int) -> int | None:
-    if open_brace_index < 0 or open_brace_index >= len(text) or text[open_brace_index] != "{":
-        return None
+            live = self._live[kind]
+            entries = self._files[kind]
+            stale = [rel for rel in entries if rel not in live]
+            for rel in stale:
+                del entries[rel]
+            if stale:
+                self._dirty = True
+        if not self._dirty:
+            return
 
-    depth = 0
-    i = open_brace_index
-    n = len(text)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        payload = {"version": self.version, "repo": self.repo, "files": self._files}
+        tmp.write_text(json.dumps(payload, separators=(",", ":"), sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._dirty = False
 
-    while i < n:
-        new_i = _strip_cpp_comments_and_track_strings(text, i)
-        if new_i != i:
-            i = new_i
-            continue
 
-        ch = text[i]
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                return i
-        i += 1
-    return None
+def _path_sort_key(rel: str) -> list[str]:
+    # Component-wise ordering, matching how the scan has always sorted pathlib.Path objects.
+    return rel.split("/")
+
+
+class WorktreeSource:
+    """Candidate files read from the checked-out working tree of --repo."""
+
+    def __init__(self, repo: Path):
+        self.repo = repo
+        self.commit: str | None = None
+
+    def list_files(self, top: str, suffixes: tuple[str, ...]) -> list[str]:
+        root = self.repo / top
+        if not root.exists():
+            return []
+        found: set[Path] = set()
+        for suffix in suffixes:
+            found.update(root.rglob(f"*{suffix}"))
+        return sorted((f.relative_to(self.repo).as_posix() for f in found), key=_path_sort_key)
+
+    def identity(self, rel: str) -> tuple[int, int | None, str | None]:
+        st = (self.repo / rel).stat()
+        return st.st_size, st.st_mtime_ns, None
+
+    def read_bytes(self, rel: str) -> bytes:
+        return (self.repo / rel).read_bytes()
+
+    def task_inputs(self, rels: list[str]):
+        # Workers map files themselves; only the path crosses the process boundary.
+        return ((rel, str(self.repo / rel)) for rel in rels)
+
+    def close(self) -> None:
+        pass
+
+
+class GitRevSource:
+    """Candidate files of a commit, read from the object store without a checkout.
+
+    The tree is listed with one `git ls-tree -r` call; blob contents stream through the
+    long-lived `git cat-file --batch` process of git_batch.GitBatch.
+    """
+
+    def __init__(self, repo: Path, rev: str, tops: tuple[str, ...] = ("csrc", "vllm")):
+        self.repo = repo
+        self.rev = rev
+        self.commit = self._git(["rev-parse", "--verify", f"{rev}^{{commit}}"]).strip()
+        self._git_batch = GitBatch(repo)
+        try:
+            entries = self._git_batch.tree_entries(self.commit, tops)
+        except RuntimeError as e:
+            raise SystemExit(str(e)) from e
+        self._entries: dict[str, tuple[str, int]] = {
+            # Skip submodules and symlinks; only regular files carry sources.
+            e.path: (e.sha, e.size)
+            for e in entries
+            if e.type == "blob" and e.mode != "120000" and e.size is not None
+        }
+
+    def _git(self, args: list[str]) -> str:
+        cmd = ["git", "-C", str(self.repo), *args]
+        try:
+            return subprocess.check_output(cmd, text=True, stderr=subprocess.STDOUT, errors="replace")
+        except subprocess.CalledProcessError as e:
+            raise SystemExit(e.output.strip() or f"git command failed: {' '.join(cmd)}") from e
+
+    def list_files(self, top: str, suffixes: tuple[str, ...]) -> list[str]:
+        prefix = top.rstrip("/") + "/"
+        return sorted(
+            (p for p in self._entries if p.startswith(prefix) and p.endswith(suffixes)),
+            key=_path_sort_key,
+        )
+
+    def identity(self, rel: str) -> tuple[int, int | None, str | None]:
+        sha, size = self._entries[rel]
+        return size, None, sha
+
+    def read_bytes(self, rel: str) -> bytes:
+        return self._git_batch.blob(self._entries[rel][0])
+
+    def task_inputs(self, rels: list[str]):
+        if not rels:
+            return iter(())
+        blobs = self._git_batch.iter_blobs([self._entries[rel][0] for rel in rels])
+        return zip(rels, blobs)
+
+    def close(self) -> None:
+        self._git_batch.close()
+
+
+def _resolve_jobs(jobs: int) -> int:
+    # 0 (or negative) means "one worker per CPU".
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def _map_files(func, items: list, jobs: int) -> list:
+    """Apply func to every item, optionally across a process pool.
+
+    Results are always returned in input order, so callers can merge them exactly like the
+    serial loop did and the rendered output stays byte-identical regardless of --jobs.
+    """
+
+    jobs = _resolve_jobs(jobs)
+    if jobs <= 1 or len(items) < 2:
+        return [func(item) for item in items]
+
+    # Larger chunks amortize pickling; keep a few chunks per worker for load balancing.
+    chunksize = max(1, len(items) // (jobs * 8))
+    with ProcessPoolExecutor(max_workers=jobs) as ex:
+        return list(ex.map(func, items, chunksize=chunksize))
+
+
+def _scan_files(
+    kind: str,
+    source: WorktreeSource | GitRevSource,
+    rels: list[str],
+    task,
+    jobs: int,
+    cache: ParseCache | None,
+    prefilter: bytes,
+) -> list:
+    """Run task over the given files, serving unchanged files from the cache.
+
+    task takes (rel, path-or-bytes, want_blob) and returns (blob id or None, JSON-friendly
+    result). Only cache misses are parsed; results come back in input order either way.
+    Contents already in memory (git blobs) that lack the prefilter token are resolved
+    in-process instead of being shipped to a worker.
+    """
+
+    results: list = [None] * len(rels)
+    todo: list[int] = []
+    idents: dict[int, tuple[int, int | None, str | None]] = {}
+    for i, rel in enumerate(rels):
+        ident = source.identity(rel)
+        idents[i] = ident
+        if cache is not None:
+            size, mtime_ns, blob = ident
+            hit, result = cache.lookup(
+                kind, rel, size, mtime_ns, blob, read_bytes=lambda rel=rel: source.read_bytes(rel)
+            )
+            if hit:
+                results[i] = result
+                continue
+        todo.append(i)
+
+    parsed: dict[int, tuple[str | None, object]] = {}
+    remote: list[int] = []
+    inputs: list[tuple[str, str | bytes, bool]] = []
+    for i, (rel, src) in zip(todo, source.task_inputs([rels[i] for i in todo])):
+        # Blob ids from the object store are known up front; only hash when they are not.
+        item = (rel, src, cache is not None and idents[i][2] is None)
+        if isinstance(src, bytes) and prefilter not in src:
+            parsed[i] = task(item)
+        else:
+            remote.append(i)
+            inputs.append(item)
+    parsed.update(zip(remote, _map_files(task, inputs, jobs)))
+
+    for i in todo:
+        blob, result = parsed[i]
+        results[i] = result
+        if cache is not None:
+            size, mtime_ns, known_blob = idents[i]
+            cache.store(kind, rels[i], size, mtime_ns, known_blob or blob, result)
+    return results
 
 
 def _extract_op_name_from_schema(schema: str) -> str | None:
@@ -135,109 +861,110 @@ def _extract_op_name_from_schema(schema: str) -> str | None:
     return m.group(0) if m else None
 
 
-def _find_torch_library_blocks(text: str, file: Path) -> list[CppBindingBlock]:
+def _block_after(lex: CppLex, pos: int) -> tuple[int, int] | None:
+    brace_open = lex.next_open(b"{", pos)
+    if brace_open is None:
+        return None
+    brace_close = lex.match.get(brace_open)
+    if brace_close is None:
+        return None
+    return brace_open, brace_close
+
+
+def _split_macro_args(buf: bytes | mmap.mmap, lex: CppLex, paren_open: int, paren_close: int) -> list[str]:
+    """Split a macro call's arguments at top-level commas, jumping over nested brackets."""
+
+    args: list[str] = []
+    start = paren_open + 1
+    i = start
+    while True:
+        m = _MACRO_ARG_SPLIT_RE.search(buf, i, paren_close)
+        if m is None:
+            break
+        i = m.start()
+        if not lex.is_code(i):
+            i += 1
+            continue
+        if m.group() == b",":
+            arg = _decode(buf[start:i]).strip()
+            if arg:
+                args.append(arg)
+            start = i + 1
+            i += 1
+        else:
+            i = lex.match.get(i, i) + 1
+    tail = _decode(buf[start:paren_close]).strip()
+    if tail:
+        args.append(tail)
+    return args
+
+
+def _find_torch_library_blocks(
+    buf: bytes | mmap.mmap, file: Path, lex: CppLex | None = None
+) -> list[CppBindingBlock]:
+    lex = lex or lex_cpp(buf)
     blocks: list[CppBindingBlock] = []
     for lib_re in (_TORCH_LIBRARY_RE, _TORCH_LIBRARY_FRAGMENT_RE, _TORCH_LIBRARY_IMPL_RE):
-        for m in lib_re.finditer(text):
-            ns = m.group("ns")
-            var = m.group("var")
-            brace_open = text.find("{", m.end())
-            if brace_open < 0:
+        for m in lib_re.finditer(buf):
+            if not lex.is_code(m.start()):
                 continue
-            brace_close = _find_matching_brace(text, brace_open)
-            if brace_close is None:
+            span = _block_after(lex, m.end())
+            if span is None:
                 continue
             blocks.append(
                 CppBindingBlock(
-                    ns=ns,
-                    var=var,
+                    ns=_decode(m.group("ns")),
+                    var=_decode(m.group("var")),
                     file=str(file),
-                    start=brace_open,
-                    end=brace_close,
+                    start=span[0],
+                    end=span[1],
+                    key=_dispatch_key(_decode(m.group("key"))) if lib_re is _TORCH_LIBRARY_IMPL_RE else "",
                 ))
 
     # TORCH_LIBRARY_EXPAND is frequently used in vLLM, and its first argument can be a macro
     # expression with nested parentheses/commas (e.g., CONCAT(TORCH_EXTENSION_NAME, _cache_ops)).
-    # Regex is error-prone here; parse the macro call with a tiny argument splitter.
-    idx = 0
-    n = len(text)
-    while True:
-        hit = text.find(_TORCH_LIBRARY_EXPAND_TOKEN, idx)
-        if hit < 0:
-            break
-
-        # Find the opening paren for the macro invocation.
-        paren_open = text.find("(", hit + len(_TORCH_LIBRARY_EXPAND_TOKEN))
-        if paren_open < 0:
-            idx = hit + len(_TORCH_LIBRARY_EXPAND_TOKEN)
-            continue
-
-        # Find the matching close paren.
-        depth = 0
-        i = paren_open
-        while i < n:
-            new_i = _strip_cpp_comments_and_track_strings(text, i)
-            if new_i != i:
-                i = new_i
+    # Regex is error-prone here; split the macro call using the lexer's bracket table.
+    # TORCH_LIBRARY_IMPL_EXPAND(ns, key, var) is handled the same way with a key argument.
+    for token, nargs in ((_TORCH_LIBRARY_EXPAND_TOKEN, 2), (_TORCH_LIBRARY_IMPL_EXPAND_TOKEN, 3)):
+        idx = 0
+        while True:
+            hit = buf.find(token, idx)
+            if hit < 0:
+                break
+            idx = hit + len(token)
+            if not lex.is_code(hit):
                 continue
-            ch = text[i]
-            if ch == "(":
-                depth += 1
-            elif ch == ")":
-                depth -= 1
-                if depth == 0:
-                    paren_close = i
-                    break
-            i += 1
-        else:
-            idx = paren_open + 1
-            continue
 
-        inside = text[paren_open + 1 : paren_close]
-        args: list[str] = []
-        buf: list[str] = []
-        depth2 = 0
-        j = 0
-        while j < len(inside):
-            ch = inside[j]
-            if ch == "(":
-                depth2 += 1
-            elif ch == ")":
-                depth2 -= 1
-            elif ch == "," and depth2 == 0:
-                arg = "".join(buf).strip()
-                if arg:
-                    args.append(arg)
-                buf = []
-                j += 1
+            paren_open = lex.next_open(b"(", idx)
+            if paren_open is None:
                 continue
-            buf.append(ch)
-            j += 1
-        tail = "".join(buf).strip()
-        if tail:
-            args.append(tail)
+            paren_close = lex.match.get(paren_open)
+            if paren_close is None:
+                continue
+            idx = paren_close + 1
 
-        if len(args) >= 2:
+            args = _split_macro_args(buf, lex, paren_open, paren_close)
+            if len(args) < nargs:
+                continue
             ns_expr = args[0]
-            var = args[1]
+            var = args[nargs - 1]
             # Variable names should be simple identifiers; skip weird parses.
-            if re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", var):
-                ns = _resolve_torch_library_expand_namespace(file, ns_expr)
-                brace_open = text.find("{", paren_close)
-                if brace_open >= 0:
-                    brace_close = _find_matching_brace(text, brace_open)
-                    if brace_close is not None:
-                        blocks.append(
-                            CppBindingBlock(
-                                ns=ns,
-                                var=var,
-                                file=str(file),
-                                start=brace_open,
-                                end=brace_close,
-                            )
-                        )
-
-        idx = paren_close + 1
+            if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", var):
+                continue
+            span = _block_after(lex, paren_close)
+            if span is None:
+                continue
+            blocks.append(
+                CppBindingBlock(
+                    ns=_resolve_torch_library_expand_namespace(file, ns_expr),
+                    var=var,
+                    file=str(file),
+                    start=span[0],
+                    end=span[1],
+                    key=_dispatch_key(args[1]) if nargs == 3 else "",
+                )
+            )
+
     # Prefer earlier blocks first; useful for deterministic output.
     blocks.sort(key=lambda b: (b.file, b.start, b.ns, b.var))
     return blocks
@@ -275,58 +1002,192 @@ def _resolve_torch_library_expand_namespace(file: Path, ns_expr: str) -> str:
     return clean
 
 
-def extract_cpp_ops_from_repo(repo: Path) -> tuple[list[CppOp], list[str]]:
-    """Scan csrc/** for TORCH_LIBRARY* blocks and extract registered op names."""
+def _dispatch_key(expr: str) -> str:
+    """Normalize `torch::kCUDA`, `c10::DispatchKey::Meta`, `"CPU"`, `CUDA` to the key name."""
+
+    text = re.sub(r"\s+", "", expr).strip('"')
+    m = _DISPATCH_KEY_RE.search(text)
+    return m.group("key") if m else text
+
+
+def _impl_dispatch_key(block: CppBindingBlock, args: list[str]) -> str:
+    # .impl("op", key, fn) | .impl("op", torch::dispatch(key, fn)) | .impl("op", fn) inside
+    # a TORCH_LIBRARY_IMPL block (block key) or a TORCH_LIBRARY block (catch-all).
+    if len(args) >= 3:
+        return _dispatch_key(args[1])
+    if len(args) == 2:
+        m = _DISPATCH_CALL_RE.match(args[1])
+        if m:
+            return _dispatch_key(m.group("key"))
+    return block.key or _IMPLICIT_DISPATCH_KEY
+
+
+def extract_cpp_registrations_from_buffer(
+    buf: bytes | mmap.mmap, file: Path, rel_file: str
+) -> tuple[list[CppOp], list[CppImpl]] | None:
+    """Extract schemas (`.def`) and kernels (`.impl`) from the TORCH_LIBRARY* blocks of one file.
+
+    Returns None when the file has no TORCH_LIBRARY* blocks at all (as opposed to blocks
+    without any registrations), so callers can tell registration sites from unrelated files.
+    """
+
+    if buf.find(_CPP_PREFILTER) < 0:
+        return None
+
+    lex = lex_cpp(buf)
+    blocks = _find_torch_library_blocks(buf, file, lex)
+    if not blocks:
+        return None
+
+    ops: list[CppOp] = []
+    impls: list[CppImpl] = []
+    found: list[tuple[int, str, str, str]] = []
+    for b in blocks:
+        var = re.escape(b.var.encode())
+        def_re = re.compile(_DEF_RE_TEMPLATE.replace(b"{var}", var))
+        for m in def_re.finditer(buf, b.start, b.end + 1):
+            if not lex.is_code(m.start()):
+                continue
+            sig = _decode(m.group("sig"))
+            name = _extract_op_name_from_schema(sig)
+            if not name:
+                continue
+            found.append((m.start(), "def", b.ns, name))
+            paren_open = lex.next_open(b"(", m.start())
+            paren_close = lex.match.get(paren_open) if paren_open is not None else None
+            if paren_close is not None and len(_split_macro_args(buf, lex, paren_open, paren_close)) >= 2:
+                found.append((m.start(), _IMPLICIT_DISPATCH_KEY, b.ns, name))
+
+        impl_re = re.compile(_IMPL_RE_TEMPLATE.replace(b"{var}", var))
+        for m in impl_re.finditer(buf, b.start, b.end + 1):
+            if not lex.is_code(m.start()):
+                continue
+            name = _extract_op_name_from_schema(_decode(m.group("op")))
+            paren_open = m.start("paren")
+            paren_close = lex.match.get(paren_open)
+            if not name or paren_close is None:
+                continue
+            args = _split_macro_args(buf, lex, paren_open, paren_close)
+            found.append((m.start(), _impl_dispatch_key(b, args), b.ns, name))
+
+    # Offsets only ever move forward through _LineCounter.
+    lines = _LineCounter(buf)
+    for offset, what, ns, name in sorted(found, key=lambda f: f[0]):
+        line = lines.line_at(offset)
+        guard = lex.guard_at(offset)
+        if what == "def":
+            ops.append(CppOp(ns=ns, name=name, file=rel_file, offset=offset, line=line, guard=guard))
+        else:
+            impls.append(
+                CppImpl(ns=ns, name=name, key=what, file=rel_file, offset=offset, line=line, guard=guard)
+            )
+    return ops, impls
+
+
+def extract_cpp_ops_from_buffer(buf: bytes | mmap.mmap, file: Path, rel_file: str) -> list[CppOp] | None:
+    """Only the `.def` schemas of extract_cpp_registrations_from_buffer()."""
+
+    found = extract_cpp_registrations_from_buffer(buf, file, rel_file)
+    return None if found is None else found[0]
+
+
+def extract_cpp_ops(path: Path, rel_file: str) -> list[CppOp] | None:
+    with _mapped(str(path)) as buf:
+        return extract_cpp_ops_from_buffer(buf, path, rel_file)
+
+
+def _extract_cpp_ops_task(item: tuple[str, str | bytes, bool]) -> tuple[str | None, dict | None]:
+    # Process-pool entry point: arguments and results must be picklable (and cacheable as
+    # JSON), so files travel as a path string or raw bytes and registrations as
+    # {"ops": [[ns, name, offset, line, guard]], "impls": [[ns, name, key, offset, line, guard]]}.
+    rel_file, src, want_blob = item
+    with _mapped(src) as buf:
+        found = extract_cpp_registrations_from_buffer(buf, Path(rel_file), rel_file)
+        blob = _blob_id(buf) if want_blob else None
+    if found is None:
+        return blob, None
+    ops, impls = found
+    return blob, {
+        "ops": [[op.ns, op.name, op.offset, op.line, op.guard] for op in ops],
+        "impls": [[i.ns, i.name, i.key, i.offset, i.line, i.guard] for i in impls],
+    }
+
+
+def extract_cpp_ops_from_repo(
+    repo: Path,
+    jobs: int = 1,
+    cache: ParseCache | None = None,
+    source: WorktreeSource | GitRevSource | None = None,
+) -> tuple[list[CppOp], list[CppImpl], list[str]]:
+    """Scan csrc/** for TORCH_LIBRARY* blocks; return schemas, kernels and the files with blocks."""
 
-    csrc = repo / "csrc"
-    if not csrc.exists():
-        return [], []
+    source = source or WorktreeSource(repo)
+    rels = source.list_files("csrc", (".cpp", ".cc", ".cxx", ".cu"))
 
-    cpp_files: list[Path] = []
-    for ext in ("*.cpp", "*.cc", "*.cxx", "*.cu"):
-        cpp_files.extend(csrc.rglob(ext))
+    results = _scan_files("cpp", source, rels, _extract_cpp_ops_task, jobs, cache, _CPP_PREFILTER)
 
     ops: list[CppOp] = []
+    impls: list[CppImpl] = []
     source_files_used: set[str] = set()
 
-    for f in sorted(set(cpp_files)):
-        text = _read_text(f)
-        if "TORCH_LIBRARY" not in text:
+    for rel_file, found in zip(rels, results):
+        if found is None:
             continue
+        source_files_used.add(rel_file)
+        ops.extend(
+            CppOp(ns=ns, name=name, file=rel_file, offset=offset, line=line, guard=guard)
+            for ns, name, offset, line, guard in found["ops"]
+        )
+        impls.extend(
+            CppImpl(ns=ns, name=name, key=key, file=rel_file, offset=offset, line=line, guard=guard)
+            for ns, name, key, offset, line, guard in found["impls"]
+        )
 
-        blocks = _find_torch_library_blocks(text, f)
-        if not blocks:
-            continue
+    return ops, impls, sorted(source_files_used)
 
-        rel_file = str(f.relative_to(repo))
-        source_files_used.add(rel_file)
 
-        for b in blocks:
-            block_text = text[b.start : b.end + 1]
-            def_re = re.compile(
-                rf"\b{re.escape(b.var)}\s*\.def\(\s*(?:TORCH_SELECTIVE_SCHEMA\s*\(\s*)?\"(?P<sig>[^\"]+)\""
-            )
-            for m in def_re.finditer(block_text):
-                sig = m.group("sig")
-                name = _extract_op_name_from_schema(sig)
-                if not name:
-                    continue
-                ops.append(CppOp(ns=b.ns, name=name, file=rel_file))
+def extract_python_op_sites(buf: bytes | mmap.mmap) -> list[tuple[int, str, str]]:
+    """Return (line, namespace, op) for every literal `torch.ops.<ns>.<op>` reference."""
 
-    return ops, sorted(source_files_used)
+    if buf.find(_PY_PREFILTER) < 0:
+        return []
+    lines = _LineCounter(buf)
+    return [
+        (lines.line_at(m.start()), _decode(m.group("ns")), _decode(m.group("op")))
+        for m in _PY_OP_RE.finditer(buf)
+    ]
 
 
-def extract_python_ops(py_path: Path) -> dict[str, set[str]]:
-    text = _read_text(py_path)
+def _ns_map_from_sites(sites) -> dict[str, set[str]]:
     out: dict[str, set[str]] = {}
-    for m in _PY_OP_RE.finditer(text):
-        ns = m.group("ns")
-        op = m.group("op")
+    for _line, ns, op in sites:
         out.setdefault(ns, set()).add(op)
     return out
 
 
-def extract_python_ops_from_repo(repo: Path) -> tuple[dict[str, set[str]], dict[str, dict[str, set[str]]]]:
+def extract_python_ops_from_buffer(buf: bytes | mmap.mmap) -> dict[str, set[str]]:
+    return _ns_map_from_sites(extract_python_op_sites(buf))
+
+
+def extract_python_ops(py_path: Path) -> dict[str, set[str]]:
+    with _mapped(str(py_path)) as buf:
+        return extract_python_ops_from_buffer(buf)
+
+
+def _extract_python_ops_task(item: tuple[str, str | bytes, bool]) -> tuple[str | None, list[list]]:
+    _rel, src, want_blob = item
+    with _mapped(src) as buf:
+        sites = extract_python_op_sites(buf)
+        blob = _blob_id(buf) if want_blob else None
+    return blob, [list(site) for site in sites]
+
+
+def extract_python_ops_from_repo(
+    repo: Path,
+    jobs: int = 1,
+    cache: ParseCache | None = None,
+    source: WorktreeSource | GitRevSource | None = None,
+) -> tuple[dict[str, set[str]], dict[str, dict[str, set[str]]]]:
     """Scan vllm/**.py for torch.ops usage.
 
     Returns:
@@ -334,17 +1195,16 @@ def extract_python_ops_from_repo(repo: Path) -> tuple[dict[str, set[str]], dict[
       - per-file mapping (repo-relative file -> namespace -> ops)
     """
 
-    pkg = repo / "vllm"
-    if not pkg.exists():
-        return {}, {}
+    source = source or WorktreeSource(repo)
+    rels = source.list_files("vllm", (".py",))
+    results = _scan_files("py", source, rels, _extract_python_ops_task, jobs, cache, _PY_PREFILTER)
 
     aggregated: dict[str, set[str]] = {}
     per_file: dict[str, dict[str, set[str]]] = {}
-    for py in sorted(pkg.rglob("*.py")):
-        ns_map = extract_python_ops(py)
-        if not ns_map:
+    for rel, result in zip(rels, results):
+        if not result:
             continue
-        rel = str(py.relative_to(repo))
+        ns_map = _ns_map_from_sites(result)
         per_file[rel] = ns_map
         for ns, ops in ns_map.items():
             aggregated.setdefault(ns, set()).update(ops)
@@ -352,14 +1212,897 @@ def extract_python_ops_from_repo(repo: Path) -> tuple[dict[str, set[str]], dict[
     return aggregated, per_file
 
 
-def render_markdown(
+def _module_name(rel: str) -> str:
+    parts = rel[: -len(".py")].split("/")
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+
+class _PyOpsResolver(ast.NodeVisitor):
+    """Resolve torch.ops references and wrapper-module calls in one Python file.
+
+    Bindings are tracked as small tuples:
+      ("mod", dotted)            a module (torch, vllm._custom_ops, ...)
+      ("ops_root",)              torch.ops
+      ("ns", ns)                 torch.ops.<ns>
+      ("op", ns, op)             torch.ops.<ns>.<op> (overloads like .default fold in)
+      ("wrapper", module, func)  a function of one of _WRAPPER_MODULES
+    Imports anywhere in the file and module-level assignments are followed; getattr() with a
+    literal attribute name resolves like attribute access. The right-hand side of an alias
+    assignment is a binding, not a call site, so only the alias's uses are recorded.
+    """
+
+    def __init__(self, rel: str):
+        self.module = _module_name(rel)
+        is_package = rel.endswith("/__init__.py")
+        self.package = self.module if is_package else self.module.rpartition(".")[0]
+        self.is_wrapper = self.module in _WRAPPER_MODULES
+        self.aliases: dict[str, tuple] = {}
+        self.sites: list[list] = []
+        self.wrapper_calls: list[list] = []
+        self.defs: dict[str, dict[str, set]] = {}
+        self._func: str | None = None
+        # Values of module-level assignments consumed as aliases by collect_bindings().
+        self._bound: set[ast.AST] = set()
+
+    def _step(self, base: tuple | None, attr: str) -> tuple | None:
+        if base is None:
+            return None
+        kind = base[0]
+        if kind == "mod":
+            dotted = f"{base[1]}.{attr}"
+            if dotted in _WRAPPER_MODULES:
+                return ("mod", dotted)
+            if base[1] in _WRAPPER_MODULES:
+                return ("wrapper", base[1], attr)
+            if base[1] == "torch" and attr == "ops":
+                return ("ops_root",)
+            return ("mod", dotted)
+        if kind == "ops_root":
+            return ("ns", attr)
+        if kind == "ns":
+            return ("op", base[1], attr)
+        if kind == "op":
+            return base
+        return None
+
+    def resolve(self, node: ast.AST) -> tuple | None:
+        if isinstance(node, ast.Name):
+            return self.aliases.get(node.id)
+        if isinstance(node, ast.Attribute):
+            return self._step(self.resolve(node.value), node.attr)
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id == "getattr"
+            and len(node.args) >= 2
+            and isinstance(node.args[1], ast.Constant)
+            and isinstance(node.args[1].value, str)
+        ):
+            return self._step(self.resolve(node.args[0]), node.args[1].value)
+        return None
+
+    def _absolute(self, module: str | None, level: int) -> str:
+        if level == 0:
+            return module or ""
+        base = self.package.split(".") if self.package else []
+        if level > 1:
+            base = base[: len(base) - (level - 1)]
+        return ".".join([*base, module] if module else base)
+
+    def collect_bindings(self, tree: ast.Module) -> None:
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        self.aliases[alias.asname] = ("mod", alias.name)
+                    else:
+                        head = alias.name.split(".", 1)[0]
+                        self.aliases[head] = ("mod", head)
+            elif isinstance(node, ast.ImportFrom):
+                module = self._absolute(node.module, node.level)
+                for alias in node.names:
+                    if alias.name == "*":
+                        continue
+                    bound = self._step(("mod", module), alias.name)
+                    if bound is not None:
+                        self.aliases[alias.asname or alias.name] = bound
+
+        # Module-level assignments, in source order, so aliases can build on each other.
+        pending = list(tree.body)
+        while pending:
+            stmt = pending.pop(0)
+            if isinstance(stmt, (ast.If, ast.Try, ast.With)):
+                nested = [*stmt.body, *getattr(stmt, "orelse", []), *getattr(stmt, "finalbody", [])]
+                for handler in getattr(stmt, "handlers", []):
+                    nested.extend(handler.body)
+                pending[:0] = nested
+                continue
+            if isinstance(stmt, ast.Assign) and len(stmt.targets) == 1:
+                target = stmt.targets[0]
+                value = stmt.value
+            elif isinstance(stmt, ast.AnnAssign) and stmt.value is not None:
+                target = stmt.target
+                value = stmt.value
+            else:
+                continue
+            if isinstance(target, ast.Name):
+                bound = self.resolve(value)
+                if bound is not None:
+                    self.aliases[target.id] = bound
+                    self._bound.add(value)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> None:
+        if self._func is None and self.is_wrapper:
+            self._func = node.name
+            self.defs.setdefault(node.name, {"ops": set(), "calls": set()})
+            self.generic_visit(node)
+            self._func = None
+        else:
+            self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Call(self, node: ast.Call) -> None:
+        if self._func is not None and isinstance(node.func, ast.Name) and node.func.id not in self.aliases:
+            # Possibly a call to a sibling wrapper; filtered against real defs later.
+            self.defs[self._func]["calls"].add(node.func.id)
+        if self._record(node):
+            for arg in node.args[2:]:
+                self.visit(arg)
+            return
+        self.generic_visit(node)
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if not self._record(node):
+            self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Load):
+            self._record(node)
+
+    def _record(self, node: ast.AST) -> bool:
+        if node in self._bound:
+            return True
+        bound = self.resolve(node)
+        if bound is None:
+            return False
+        if bound[0] == "op":
+            self.sites.append([node.lineno, bound[1], bound[2]])
+            if self._func is not None:
+                self.defs[self._func]["ops"].add((bound[1], bound[2]))
+            return True
+        if bound[0] == "wrapper":
+            if bound[1] != self.module:
+                self.wrapper_calls.append([node.lineno, bound[1], bound[2]])
+            elif self._func is not None:
+                self.defs[self._func]["calls"].add(bound[2])
+            return True
+        return False
+
+
+def summarize_python_file(text: str, rel: str) -> dict | None:
+    """AST summary of one file: resolved op sites, wrapper calls and (for wrapper modules)
+    the ops each top-level function reaches directly. None if the file does not parse."""
+
+    try:
+        tree = ast.parse(text, filename=rel)
+    except (SyntaxError, ValueError):
+        return None
+    resolver = _PyOpsResolver(rel)
+    resolver.collect_bindings(tree)
+    resolver.visit(tree)
+    summary: dict = {"sites": resolver.sites, "wrapper_calls": resolver.wrapper_calls}
+    if resolver.is_wrapper:
+        summary["defs"] = {
+            name: {"ops": sorted([ns, op] for ns, op in d["ops"]), "calls": sorted(d["calls"])}
+            for name, d in resolver.defs.items()
+        }
+    return summary
+
+
+def _summarize_python_task(item: tuple[str, str | bytes, bool]) -> tuple[str | None, dict | None]:
+    rel, src, want_blob = item
+    with _mapped(src) as buf:
+        blob = _blob_id(buf) if want_blob else None
+        if buf.find(_AST_PREFILTER) < 0:
+            return blob, None
+        text = _decode(buf[:])
+    return blob, summarize_python_file(text, rel)
+
+
+def resolve_op_call_sites(summaries: dict[str, dict]) -> dict[str, list[tuple[str, int, str]]]:
+    """Map "ns.op" to its transitive Python call sites as (file, line, via).
+
+    via is "direct" for torch.ops references (through any alias) or the dotted wrapper
+    function name when the call goes through a wrapper module.
+    """
+
+    defs: dict[tuple[str, str], dict] = {}
+    for rel, summary in summaries.items():
+        module = _module_name(rel)
+        for name, d in (summary.get("defs") or {}).items():
+            defs[(module, name)] = d
+
+    closure: dict[tuple[str, str], set[tuple[str, str]]] = {}
+
+    def reach(key: tuple[str, str], active: set[tuple[str, str]]) -> set[tuple[str, str]]:
+        if key in closure:
+            return closure[key]
+        d = defs.get(key)
+        if d is None or key in active:
+            return set()
+        active.add(key)
+        ops = {(ns, op) for ns, op in d["ops"]}
+        for callee in d["calls"]:
+            ops |= reach((key[0], callee), active)
+        active.discard(key)
+        closure[key] = ops
+        return ops
+
+    out: dict[str, list[tuple[str, int, str]]] = {}
+    for rel in sorted(summaries):
+        summary = summaries[rel]
+        for line, ns, op in summary["sites"]:
+            out.setdefault(f"{ns}.{op}", []).append((rel, line, "direct"))
+        for line, module, func in summary["wrapper_calls"]:
+            for ns, op in sorted(reach((module, func), set())):
+                out.setdefault(f"{ns}.{op}", []).append((rel, line, f"{module}.{func}"))
+    for sites in out.values():
+        sites.sort()
+    return out
+
+
+def extract_python_call_sites_from_repo(
+    repo: Path,
+    jobs: int = 1,
+    cache: ParseCache | None = None,
+    source: WorktreeSource | GitRevSource | None = None,
+) -> dict[str, list[tuple[str, int, str]]]:
+    """AST-resolve vllm/**.py and return transitive call sites per op (see resolve_op_call_sites)."""
+
+    source = source or WorktreeSource(repo)
+    rels = source.list_files("vllm", (".py",))
+    results = _scan_files("ast", source, rels, _summarize_python_task, jobs, cache, _AST_PREFILTER)
+    summaries = {rel: summary for rel, summary in zip(rels, results) if summary}
+    return resolve_op_call_sites(summaries)
+
+
+@dataclass
+class Catalog:
+    """Everything the extractor knows about one scan, independent of the output format.
+
+    A Catalog can be written as compact JSON or NDJSON and loaded back without rescanning;
+    render_markdown() works from either a fresh scan or a loaded file.
+    """
+
+    repo: str
+    generated: str
+    cpp_ops: list[CppOp]
+    native_sources: list[str]
+    python_per_file: dict[str, dict[str, set[str]]]
+    rev: str | None = None
+    commit: str | None = None
+    # "ns.op" -> [(file, line, via)] from the AST resolver; None when it was not run.
+    op_call_sites: dict[str, list[tuple[str, int, str]]] | None = None
+    cpp_impls: list[CppImpl] = field(default_factory=list)
+
+    @property
+    def python_agg(self) -> dict[str, set[str]]:
+        aggregated: dict[str, set[str]] = {}
+        for ns_map in self.python_per_file.values():
+            for ns, ops in ns_map.items():
+                aggregated.setdefault(ns, set()).update(ops)
+        return aggregated
+
+    def ops_by_namespace(self) -> dict[str, set[str]]:
+        by_ns: dict[str, set[str]] = {}
+        for op in self.cpp_ops:
+            by_ns.setdefault(op.ns, set()).add(op.name)
+        return by_ns
+
+    def files_by_namespace(self) -> dict[str, set[str]]:
+        by_ns_files: dict[str, set[str]] = {}
+        for op in self.cpp_ops:
+            by_ns_files.setdefault(op.ns, set()).add(op.file)
+        return by_ns_files
+
+    def dispatch_matrix(self) -> tuple[list[str], dict[tuple[str, str], dict[str, list[CppImpl]]]]:
+        """Dispatch keys in column order, and (ns, op) -> key -> kernels for every op that has
+        a schema or a kernel."""
+
+        matrix: dict[tuple[str, str], dict[str, list[CppImpl]]] = {
+            (op.ns, op.name): {} for op in self.cpp_ops
+        }
+        for impl in self.cpp_impls:
+            matrix.setdefault((impl.ns, impl.name), {}).setdefault(impl.key, []).append(impl)
+        keys = {impl.key for impl in self.cpp_impls}
+        ordered = [k for k in _DISPATCH_KEY_ORDER if k in keys] + sorted(keys - set(_DISPATCH_KEY_ORDER))
+        return ordered, matrix
+
+    def schemas_without_impl(self) -> list[tuple[str, str]]:
+        implemented = {(i.ns, i.name) for i in self.cpp_impls}
+        return sorted({(op.ns, op.name) for op in self.cpp_ops} - implemented)
+
+    def impls_without_schema(self) -> list[tuple[str, str]]:
+        defined = {(op.ns, op.name) for op in self.cpp_ops}
+        return sorted({(i.ns, i.name) for i in self.cpp_impls} - defined)
+
+    def platform_matrix(self, platforms: list[Platform]) -> dict[tuple[str, str], list[bool | None]]:
+        """(ns, op) -> availability per platform, from the recorded guards (no rescan).
+
+        An op is available when any of its registrations is compiled for the platform;
+        None means its only candidate guards could not be evaluated.
+        """
+
+        matrix: dict[tuple[str, str], list[bool | None]] = {}
+        for op in self.cpp_ops:
+            row = matrix.setdefault((op.ns, op.name), [False] * len(platforms))
+            for i, platform in enumerate(platforms):
+                if row[i]:
+                    continue
+                has = platform.has(op)
+                if has or row[i] is False:
+                    row[i] = has
+        return matrix
+
+    def python_only_namespaces(self) -> list[str]:
+        """Namespaces used from Python but not registered by the native bindings scan."""
+        return sorted(set(self.python_agg) - set(self.ops_by_namespace()))
+
+    def native_only_namespaces(self) -> list[str]:
+        """Namespaces registered natively but never referenced by the Python scan."""
+        return sorted(set(self.ops_by_namespace()) - set(self.python_agg))
+
+    def to_dict(self) -> dict:
+        return {
+            "format": CATALOG_FORMAT,
+            "version": CATALOG_VERSION,
+            "repo": self.repo,
+            "rev": self.rev,
+            "commit": self.commit,
+            "generated": self.generated,
+            "ops": [
+                {
+                    "ns": op.ns,
+                    "name": op.name,
+                    "file": op.file,
+                    "offset": op.offset,
+                    "line": op.line,
+                    "guard": op.guard,
+                }
+                for op in self.cpp_ops
+            ],
+            "impls": [
+                {
+                    "ns": i.ns,
+                    "name": i.name,
+                    "key": i.key,
+                    "file": i.file,
+                    "offset": i.offset,
+                    "line": i.line,
+                    "guard": i.guard,
+                }
+                for i in self.cpp_impls
+            ],
+            "native_sources": self.native_sources,
+            "python_files": {
+                rel: {ns: sorted(ops) for ns, ops in sorted(ns_map.items())}
+                for rel, ns_map in self.python_per_file.items()
+            },
+            "op_call_sites": None
+            if self.op_call_sites is None
+            else {key: [list(site) for site in sites] for key, sites in sorted(self.op_call_sites.items())},
+            # Derived, but handy for consumers that only want the reconciliation view.
+            "reconciliation": {
+                "python_only_namespaces": self.python_only_namespaces(),
+                "native_only_namespaces": self.native_only_namespaces(),
+                "schemas_without_impl": [f"{ns}.{name}" for ns, name in self.schemas_without_impl()],
+                "impls_without_schema": [f"{ns}.{name}" for ns, name in self.impls_without_schema()],
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Catalog:
+        if data.get("format") != CATALOG_FORMAT:
+            raise ValueError("Not a custom-ops catalog file")
+        if data.get("version") != CATALOG_VERSION:
+            raise ValueError(
+                f"Unsupported catalog version {data.get('version')!r} (expected {CATALOG_VERSION})"
+            )
+        return cls(
+            repo=data["repo"],
+            generated=data["generated"],
+            cpp_ops=[
+                CppOp(
+                    ns=o["ns"],
+                    name=o["name"],
+                    file=o["file"],
+                    offset=o.get("offset", -1),
+                    line=o.get("line", 0),
+                    guard=o.get("guard", ""),
+                )
+                for o in data["ops"]
+            ],
+            cpp_impls=[
+                CppImpl(
+                    ns=i["ns"],
+                    name=i["name"],
+                    key=i["key"],
+                    file=i["file"],
+                    offset=i.get("offset", -1),
+                    line=i.get("line", 0),
+                    guard=i.get("guard", ""),
+                )
+                for i in data.get("impls", [])
+            ],
+            native_sources=list(data["native_sources"]),
+            python_per_file={
+                rel: {ns: set(ops) for ns, ops in ns_map.items()}
+                for rel, ns_map in data["python_files"].items()
+            },
+            rev=data.get("rev"),
+            commit=data.get("commit"),
+            op_call_sites=None
+            if data.get("op_call_sites") is None
+            else {
+                key: [(file, line, via) for file, line, via in sites]
+                for key, sites in data["op_call_sites"].items()
+            },
+        )
+
+    def platform_records(self, platforms: list[Platform]) -> tuple[list[dict], dict[str, dict]]:
+        """--platforms for json/ndjson: the configurations and "ns.op" -> {platform: bool|None}.
+
+        Derived from the recorded guards, so loads() ignores them; reload and pass
+        --platforms again to re-evaluate.
+        """
+
+        configs = [
+            {"name": p.name, "defines": p.defines, "include": list(p.include), "exclude": list(p.exclude)}
+            for p in platforms
+        ]
+        availability = {
+            f"{ns}.{name}": {p.name: has for p, has in zip(platforms, row)}
+            for (ns, name), row in sorted(self.platform_matrix(platforms).items())
+        }
+        return configs, availability
+
+    def dumps(self, fmt: str = "json", platforms: list[Platform] | None = None) -> str:
+        data = self.to_dict()
+        configs, availability = self.platform_records(platforms) if platforms else ([], {})
+        if fmt == "json":
+            if platforms:
+                data["platforms"] = configs
+                data["availability"] = availability
+            return json.dumps(data, separators=(",", ":")) + "\n"
+        if fmt != "ndjson":
+            raise ValueError(f"Unknown catalog format: {fmt}")
+
+        # NDJSON: a header record, then one record per op / source / Python file, so tools
+        # can stream or grep it line by line.
+        records: list[dict] = [
+            {
+                "type": "catalog",
+                **{k: data[k] for k in ("format", "version", "repo", "rev", "commit", "generated")},
+                "reconciliation": data["reconciliation"],
+                "resolved_calls": data["op_call_sites"] is not None,
+            }
+        ]
+        records.extend({"type": "op", **op} for op in data["ops"])
+        records.extend({"type": "impl", **impl} for impl in data["impls"])
+        records.extend({"type": "native_source", "file": f} for f in data["native_sources"])
+        records.extend(
+            {"type": "python_file", "file": rel, "ops": ns_map}
+            for rel, ns_map in data["python_files"].items()
+        )
+        for key, sites in (data["op_call_sites"] or {}).items():
+            records.extend(
+                {"type": "call_site", "op": key, "file": file, "line": line, "via": via}
+                for file, line, via in sites
+            )
+        records.extend({"type": "platform", **config} for config in configs)
+        records.extend(
+            {"type": "availability", "op": key, "platforms": row} for key, row in availability.items()
+        )
+        return "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+
+    @classmethod
+    def loads(cls, text: str) -> Catalog:
+        stripped = text.lstrip()
+        first_line = stripped.split("\n", 1)[0]
+        header = json.loads(first_line) if first_line else {}
+        if header.get("type") != "catalog":
+            return cls.from_dict(json.loads(text))
+
+        data = {
+            k: v for k, v in header.items() if k not in ("type", "reconciliation", "resolved_calls")
+        }
+        data.update(ops=[], impls=[], native_sources=[], python_files={})
+        data["op_call_sites"] = {} if header.get("resolved_calls") else None
+        for line in stripped.splitlines()[1:]:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            kind = record.pop("type", None)
+            if kind == "op":
+                data["ops"].append(record)
+            elif kind == "impl":
+                data["impls"].append(record)
+            elif kind == "native_source":
+                data["native_sources"].append(record["file"])
+            elif kind == "python_file":
+                data["python_files"][record["file"]] = record["ops"]
+            elif kind == "call_site" and data["op_call_sites"] is not None:
+                data["op_call_sites"].setdefault(record["op"], []).append(
+                    [record["file"], record["line"], record["via"]]
+                )
+        return cls.from_dict(data)
+
+    @classmethod
+    def load(cls, path: Path) -> Catalog:
+        return cls.loads(path.read_text(encoding="utf-8"))
+
+
+def build_catalog(
     repo: Path,
-    cpp_ops: list[CppOp],
-    native_sources: list[str],
-    python_agg: dict[str, set[str]],
-    python_per_file: dict[str, dict[str, set[str]]],
-) -> str:
-    now = datetime.now().strftime("%Y-%m-%d %H:%M")
+    jobs: int = 1,
+    cache: ParseCache | None = None,
+    source: WorktreeSource | GitRevSource | None = None,
+    resolve_calls: bool = False,
+) -> Catalog:
+    """Scan native bindings and Python usage into a Catalog.
+
+    With resolve_calls, Python files are also AST-parsed to attribute call sites that go
+    through aliases and wrapper modules (see resolve_op_call_sites).
+    """
+
+    source = source or WorktreeSource(repo)
+    cpp_ops, cpp_impls, native_sources = extract_cpp_ops_from_repo(
+        repo, jobs=jobs, cache=cache, source=source
+    )
+    _python_agg, python_per_file = extract_python_ops_from_repo(
+        repo, jobs=jobs, cache=cache, source=source
+    )
+    op_call_sites = None
+    if resolve_calls:
+        op_call_sites = extract_python_call_sites_from_repo(repo, jobs=jobs, cache=cache, source=source)
+    return Catalog(
+        repo=str(repo),
+        generated=datetime.now().strftime("%Y-%m-%d %H:%M"),
+        cpp_ops=cpp_ops,
+        cpp_impls=cpp_impls,
+        native_sources=native_sources,
+        python_per_file=python_per_file,
+        rev=getattr(source, "rev", None),
+        commit=source.commit,
+        op_call_sites=op_call_sites,
+    )
+
+
+_INDEX_VERSION = "3"
+
+_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS files (
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER,
+    blob TEXT NOT NULL,
+    registers INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (kind, path)
+);
+CREATE TABLE IF NOT EXISTS ops (
+    ns TEXT NOT NULL,
+    name TEXT NOT NULL,
+    file TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    guard TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS impls (
+    ns TEXT NOT NULL,
+    name TEXT NOT NULL,
+    dispatch_key TEXT NOT NULL,
+    file TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    guard TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS py_calls (
+    file TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    ns TEXT NOT NULL,
+    op TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS namespaces (
+    name TEXT PRIMARY KEY,
+    native_ops INTEGER NOT NULL,
+    python_calls INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ops_by_name ON ops (name, ns);
+CREATE INDEX IF NOT EXISTS ops_by_ns ON ops (ns);
+CREATE INDEX IF NOT EXISTS ops_by_file ON ops (file);
+CREATE INDEX IF NOT EXISTS impls_by_name ON impls (name, ns);
+CREATE INDEX IF NOT EXISTS impls_by_file ON impls (file);
+CREATE INDEX IF NOT EXISTS py_calls_by_op ON py_calls (op, ns);
+CREATE INDEX IF NOT EXISTS py_calls_by_ns ON py_calls (ns);
+CREATE INDEX IF NOT EXISTS py_calls_by_file ON py_calls (file);
+"""
+
+
+class OpsIndex:
+    """Persistent SQLite index of op registrations and Python call sites.
+
+    It speaks the same lookup/store/save protocol as ParseCache, so a refresh goes through
+    _scan_files and only re-parses (and rewrites the rows of) files that changed.
+    """
+
+    def __init__(self, path: Path, repo: Path):
+        self.path = path
+        self.repo = str(repo)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.executescript(_INDEX_SCHEMA)
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        version = f"{_INDEX_VERSION}:{_cache_version()}"
+        if meta.get("version") != version or meta.get("repo") != self.repo:
+            # Drop rather than empty the tables: older index versions may have other columns.
+            for table in ("files", "ops", "impls", "py_calls", "namespaces", "meta"):
+                self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.executescript(_INDEX_SCHEMA)
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO meta (key, value) VALUES (?, ?)",
+                    [("version", version), ("repo", self.repo)],
+                )
+        self._known: dict[tuple[str, str], tuple[int, int | None, str]] = {
+            (kind, rel): (size, mtime_ns, blob)
+            for kind, rel, size, mtime_ns, blob in self.conn.execute(
+                "SELECT kind, path, size, mtime_ns, blob FROM files"
+            )
+        }
+        self._live: set[tuple[str, str]] = set()
+
+    @classmethod
+    def for_repo(cls, cache_dir: Path, repo: Path) -> OpsIndex:
+        return cls(cache_dir / f"custom-ops-{_cache_slug(repo)}.sqlite", repo)
+
+    def lookup(
+        self,
+        kind: str,
+        rel: str,
+        size: int,
+        mtime_ns: int | None = None,
+        blob: str | None = None,
+        read_bytes=None,
+    ) -> tuple[bool, object]:
+        self._live.add((kind, rel))
+        known = self._known.get((kind, rel))
+        if known is None or not _identity_matches(*known, size, mtime_ns, blob, read_bytes):
+            return False, None
+        if mtime_ns is not None and known[1] != mtime_ns:
+            self.conn.execute(
+                "UPDATE files SET mtime_ns = ? WHERE kind = ? AND path = ?", (mtime_ns, kind, rel)
+            )
+        # Rows are already in the index; callers of a refresh don't need the parsed result.
+        return True, None
+
+    def store(
+        self, kind: str, rel: str, size: int, mtime_ns: int | None, blob: str, result: object
+    ) -> None:
+        self._delete_rows(kind, rel)
+        self.conn.execute(
+            "INSERT INTO files (kind, path, size, mtime_ns, blob, registers) VALUES (?, ?, ?, ?, ?, ?)",
+            (kind, rel, size, mtime_ns, blob, int(bool(result))),
+        )
+        if kind == "cpp" and result:
+            self.conn.executemany(
+                "INSERT INTO ops (ns, name, file, offset, line, guard) VALUES (?, ?, ?, ?, ?, ?)",
+                [(ns, name, rel, offset, line, guard) for ns, name, offset, line, guard in result["ops"]],
+            )
+            self.conn.executemany(
+                "INSERT INTO impls (ns, name, dispatch_key, file, offset, line, guard)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (ns, name, key, rel, offset, line, guard)
+                    for ns, name, key, offset, line, guard in result["impls"]
+                ],
+            )
+        elif kind == "py" and result:
+            self.conn.executemany(
+                "INSERT INTO py_calls (file, line, ns, op) VALUES (?, ?, ?, ?)",
+                [(rel, line, ns, op) for line, ns, op in result],
+            )
+
+    def _delete_rows(self, kind: str, rel: str) -> None:
+        self.conn.execute("DELETE FROM files WHERE kind = ? AND path = ?", (kind, rel))
+        if kind == "cpp":
+            self.conn.execute("DELETE FROM ops WHERE file = ?", (rel,))
+            self.conn.execute("DELETE FROM impls WHERE file = ?", (rel,))
+        else:
+            self.conn.execute("DELETE FROM py_calls WHERE file = ?", (rel,))
+
+    def save(self) -> None:
+        for kind, rel in set(self._known) - self._live:
+            self._delete_rows(kind, rel)
+        self.conn.execute("DELETE FROM namespaces")
+        self.conn.execute(
+            """
+            INSERT INTO namespaces (name, native_ops, python_calls)
+            SELECT ns, SUM(native), SUM(python) FROM (
+                SELECT ns, COUNT(DISTINCT name) AS native, 0 AS python FROM ops GROUP BY ns
+                UNION ALL
+                SELECT ns, 0, COUNT(*) FROM py_calls GROUP BY ns
+            ) GROUP BY ns
+            """
+        )
+        self.conn.commit()
+
+    def refresh(self, repo: Path, source: WorktreeSource | GitRevSource, jobs: int = 1) -> None:
+        cpp_rels = source.list_files("csrc", (".cpp", ".cc", ".cxx", ".cu"))
+        _scan_files("cpp", source, cpp_rels, _extract_cpp_ops_task, jobs, self, _CPP_PREFILTER)
+        py_rels = source.list_files("vllm", (".py",))
+        _scan_files("py", source, py_rels, _extract_python_ops_task, jobs, self, _PY_PREFILTER)
+        self.save()
+
+    def find_op(self, name: str, ns: str | None = None) -> list[tuple[str, str, str, int, int, str]]:
+        sql = "SELECT ns, name, file, offset, line, guard FROM ops WHERE name = ?"
+        params: list[str] = [name]
+        if ns is not None:
+            sql += " AND ns = ?"
+            params.append(ns)
+        return list(self.conn.execute(sql + " ORDER BY ns, file, offset", params))
+
+    def find_impls(self, name: str, ns: str | None = None) -> list[tuple[str, str, str, str, int, str]]:
+        sql = "SELECT ns, name, dispatch_key, file, line, guard FROM impls WHERE name = ?"
+        params: list[str] = [name]
+        if ns is not None:
+            sql += " AND ns = ?"
+            params.append(ns)
+        return list(self.conn.execute(sql + " ORDER BY ns, dispatch_key, file, offset", params))
+
+    def call_sites(self, op: str, ns: str | None = None) -> list[tuple[str, int, str, str]]:
+        sql = "SELECT file, line, ns, op FROM py_calls WHERE op = ?"
+        params: list[str] = [op]
+        if ns is not None:
+            sql += " AND ns = ?"
+            params.append(ns)
+        return list(self.conn.execute(sql + " ORDER BY file, line", params))
+
+    def namespace_ops(self, ns: str) -> list[tuple[str, str, int, int]]:
+        return list(
+            self.conn.execute(
+                """
+                SELECT o.name, o.file, o.line,
+                       (SELECT COUNT(*) FROM py_calls p WHERE p.ns = o.ns AND p.op = o.name)
+                FROM ops o WHERE o.ns = ? ORDER BY o.name, o.file
+                """,
+                (ns,),
+            )
+        )
+
+    def namespace_summary(self, ns: str) -> tuple[int, int] | None:
+        row = self.conn.execute(
+            "SELECT native_ops, python_calls FROM namespaces WHERE name = ?", (ns,)
+        ).fetchone()
+        return None if row is None else (row[0], row[1])
+
+    def file_ops(self, rel: str) -> list[tuple[str, str, int, int]]:
+        return list(
+            self.conn.execute(
+                "SELECT ns, name, offset, line FROM ops WHERE file = ? ORDER BY offset", (rel,)
+            )
+        )
+
+    def file_calls(self, rel: str) -> list[tuple[int, str, str]]:
+        return list(
+            self.conn.execute(
+                "SELECT line, ns, op FROM py_calls WHERE file = ? ORDER BY line, ns, op", (rel,)
+            )
+        )
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _parse_op_ref(ref: str) -> tuple[str | None, str]:
+    """Accept `op`, `ns.op` or `torch.ops.ns.op`."""
+
+    ref = ref.strip()
+    if ref.startswith("torch.ops."):
+        ref = ref[len("torch.ops.") :]
+    if "." in ref:
+        ns, op = ref.rsplit(".", 1)
+        return ns, op
+    return None, ref
+
+
+def query_main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(
+        prog="extract_vllm_custom_ops_catalog.py query",
+        description="Look up op registrations and Python call sites from a persisted SQLite index.",
+    )
+    ap.add_argument("--repo", default=str(Path.home() / "vllm"), help="Path to vLLM git repo")
+    ap.add_argument(
+        "--index",
+        default=None,
+        help="SQLite index path (default: <notes>/.cache/custom-ops-<repo>-<hash>.sqlite)",
+    )
+    ap.add_argument("--rev", default=None, help="Index this revision from the object store instead")
+    ap.add_argument("--jobs", "-j", type=int, default=1, help="Worker processes for re-parsing")
+    ap.add_argument(
+        "--no-refresh",
+        action="store_true",
+        help="Answer from the index as-is without checking for changed files.",
+    )
+    target = ap.add_mutually_exclusive_group(required=True)
+    target.add_argument("--op", help="Op name: `op`, `ns.op` or `torch.ops.ns.op`")
+    target.add_argument("--ns", help="Namespace, e.g. _C or _moe_C")
+    target.add_argument("--file", help="Repo-relative binding or Python file")
+    args = ap.parse_args(argv)
+
+    repo = Path(args.repo).expanduser().resolve()
+    if args.index:
+        index = OpsIndex(Path(args.index).expanduser().resolve(), repo)
+    else:
+        index = OpsIndex.for_repo(_DEFAULT_CACHE_DIR, repo)
+
+    try:
+        if not args.no_refresh:
+            source: WorktreeSource | GitRevSource
+            source = GitRevSource(repo, args.rev) if args.rev else WorktreeSource(repo)
+            try:
+                index.refresh(repo, source, jobs=args.jobs)
+            finally:
+                source.close()
+
+        lines: list[str] = []
+        if args.op:
+            ns, op = _parse_op_ref(args.op)
+            for op_ns, name, file, offset, line, guard in index.find_op(op, ns):
+                where = f"torch.ops.{op_ns}.{name}  registered at {file}:{line} (byte {offset})"
+                lines.append(f"{where}  #if {guard}" if guard else where)
+            for op_ns, name, key, file, line, guard in index.find_impls(op, ns):
+                where = f"torch.ops.{op_ns}.{name}  [{key}] kernel at {file}:{line}"
+                lines.append(f"{where}  #if {guard}" if guard else where)
+            sites = index.call_sites(op, ns)
+            if sites:
+                lines.append(f"Python call sites ({len(sites)}):")
+                for file, line, site_ns, site_op in sites:
+                    lines.append(f"  {file}:{line}  torch.ops.{site_ns}.{site_op}")
+        elif args.ns:
+            ns = args.ns[len("torch.ops.") :] if args.ns.startswith("torch.ops.") else args.ns
+            summary = index.namespace_summary(ns)
+            if summary is not None:
+                lines.append(f"torch.ops.{ns}: {summary[0]} native ops, {summary[1]} Python call sites")
+                for name, file, line, calls in index.namespace_ops(ns):
+                    lines.append(f"  {name}  {file}:{line}  ({calls} Python call sites)")
+        else:
+            rel = Path(args.file).as_posix()
+            for ns, name, offset, line in index.file_ops(rel):
+                lines.append(f"{rel}:{line} (byte {offset})  registers torch.ops.{ns}.{name}")
+            for line, ns, op in index.file_calls(rel):
+                lines.append(f"{rel}:{line}  calls torch.ops.{ns}.{op}")
+    finally:
+        index.close()
+
+    if not lines:
+        print("No matches.")
+        return 1
+    print("\n".join(lines))
+    return 0
+
+
+def render_markdown(catalog: Catalog, platforms: list[Platform] | None = None) -> str:
+    repo = Path(catalog.repo)
+    native_sources = catalog.native_sources
+    python_agg = catalog.python_agg
+    python_per_file = catalog.python_per_file
+    rev = catalog.rev
+    commit = catalog.commit
 
     lines: list[str] = []
     lines.append("# vLLM custom ops catalog (Python-exposed)")
@@ -369,8 +2112,11 @@ def render_markdown(
         "[Chinese (ZH-CN)](vllm-custom-ops-catalog.zh-CN.md)"
     )
     lines.append("")
-    lines.append(f"Repo: `{repo}`")
-    lines.append(f"Generated: `{now}`")
+    if rev is not None and commit is not None:
+        lines.append(f"Repo: `{repo}` @ `{rev}` (`{commit[:12]}`)")
+    else:
+        lines.append(f"Repo: `{repo}`")
+    lines.append(f"Generated: `{catalog.generated}`")
     lines.append("")
     lines.append(
         "This document lists custom operators exposed to Python via `torch.ops.*` "
@@ -391,11 +2137,8 @@ def render_markdown(
         lines.append(f"- `{f}`")
     lines.append("")
 
-    by_ns: dict[str, set[str]] = {}
-    by_ns_files: dict[str, set[str]] = {}
-    for op in cpp_ops:
-        by_ns.setdefault(op.ns, set()).add(op.name)
-        by_ns_files.setdefault(op.ns, set()).add(op.file)
+    by_ns = catalog.ops_by_namespace()
+    by_ns_files = catalog.files_by_namespace()
 
     for ns in sorted(by_ns.keys()):
         lines.append(f"### `torch.ops.{ns}`")
@@ -419,6 +2162,79 @@ def render_markdown(
             lines.append(f"| `{name}` |")
         lines.append("")
 
+    keys, dispatch = catalog.dispatch_matrix()
+    if keys:
+        lines.append("### Dispatch-key coverage")
+        lines.append("")
+        lines.append(
+            "Kernels from `.impl(\"op\", [key,] fn)` in `TORCH_LIBRARY*` blocks (the block's key for "
+            "`TORCH_LIBRARY_IMPL*`); `.def(schema, fn)` and key-less `.impl` count as "
+            f"`{_IMPLICIT_DISPATCH_KEY}`."
+        )
+        lines.append("")
+        lines.append("| Op | " + " | ".join(f"`{k}`" for k in keys) + " |")
+        lines.append("|---|" + ":-:|" * len(keys))
+        for ns, name in sorted(dispatch):
+            row = dispatch[(ns, name)]
+            lines.append(
+                f"| `torch.ops.{ns}.{name}` | " + " | ".join("✓" if k in row else "" for k in keys) + " |"
+            )
+        lines.append("")
+        no_impl = catalog.schemas_without_impl()
+        no_schema = catalog.impls_without_schema()
+        lines.append("Schemas without any kernel in the scanned sources:")
+        lines.append("")
+        lines.extend(f"- `torch.ops.{ns}.{name}`" for ns, name in no_impl)
+        if not no_impl:
+            lines.append("- (none)")
+        lines.append("")
+        lines.append("Kernels registered for ops with no `.def` schema in the scanned sources:")
+        lines.append("")
+        for ns, name in no_schema:
+            where = ", ".join(
+                sorted({f"`{i.file}:{i.line}` ({i.key})" for k in dispatch[(ns, name)].values() for i in k})
+            )
+            lines.append(f"- `torch.ops.{ns}.{name}`: {where}")
+        if not no_schema:
+            lines.append("- (none)")
+        lines.append("")
+
+    if platforms:
+        matrix = catalog.platform_matrix(platforms)
+        guards: dict[tuple[str, str], set[str]] = {}
+        for op in catalog.cpp_ops:
+            guards.setdefault((op.ns, op.name), set()).add(op.guard)
+        lines.append("### Platform availability")
+        lines.append("")
+        lines.append(
+            "Evaluated from the `#if`/`#ifdef` conditions around each `.def(...)` and the sources each "
+            "platform builds; `?` marks conditions the evaluator could not parse."
+        )
+        lines.append("")
+        for platform in platforms:
+            defines = ", ".join(
+                f"`{k}`" if v == 1 else f"`{k}={v}`" for k, v in sorted(platform.defines.items())
+            )
+            lines.append(f"- `{platform.name}`: {defines or '(no macros)'}")
+        lines.append("")
+        lines.append("| Op | " + " | ".join(f"`{p.name}`" for p in platforms) + " | Conditions |")
+        lines.append("|---|" + ":-:|" * len(platforms) + "---|")
+        cell = {True: "✓", False: "", None: "?"}
+        for key in sorted(matrix):
+            conds = sorted(g for g in guards[key] if g)
+            if "" in guards[key]:
+                conds.insert(0, "(always)")
+            lines.append(
+                f"| `torch.ops.{key[0]}.{key[1]}` | "
+                + " | ".join(cell[v] for v in matrix[key])
+                + " | "
+                + "; ".join(f"`{c}`" if c != "(always)" else c for c in conds)
+                + " |"
+            )
+        totals = [sum(1 for row in matrix.values() if row[i]) for i in range(len(platforms))]
+        lines.append("| **Total** | " + " | ".join(f"**{n}**" for n in totals) + " | |")
+        lines.append("")
+
     lines.append("## 2) Python `torch.ops.*` usage")
     lines.append("")
     lines.append(
@@ -454,12 +2270,32 @@ def render_markdown(
             )
     lines.append("")
 
+    if catalog.op_call_sites is not None:
+        lines.append("### Native ops → Python call sites (AST-resolved)")
+        lines.append("")
+        lines.append(
+            "Follows module-level aliases (`ops = torch.ops._C`), `getattr(torch.ops.<ns>, \"op\")` "
+            "and calls through wrapper modules (" + ", ".join(f"`{m}`" for m in _WRAPPER_MODULES) + ")."
+        )
+        lines.append("")
+        lines.append("| Op | Direct | Via wrappers | Call sites |")
+        lines.append("|---|---:|---:|---|")
+        for ns in sorted(by_ns.keys()):
+            for name in sorted(by_ns[ns]):
+                sites = catalog.op_call_sites.get(f"{ns}.{name}", [])
+                direct = sum(1 for _f, _l, via in sites if via == "direct")
+                shown = ", ".join(f"`{f}:{line}`" for f, line, _via in sites[:5])
+                if len(sites) > 5:
+                    shown += f" (+{len(sites) - 5} more)"
+                lines.append(
+                    f"| `torch.ops.{ns}.{name}` | {direct} | {len(sites) - direct} | {shown or '-'} |"
+                )
+        lines.append("")
+
     lines.append("## 3) Reconciliation")
     lines.append("")
-    native_namespaces = set(by_ns.keys())
-    python_namespaces = set(python_agg.keys())
-    python_minus_native = sorted(python_namespaces - native_namespaces)
-    native_minus_python = sorted(native_namespaces - python_namespaces)
+    python_minus_native = catalog.python_only_namespaces()
+    native_minus_python = catalog.native_only_namespaces()
 
     lines.append("### Namespaces used in Python but not found in vLLM native bindings scan")
     lines.append("")
@@ -495,17 +2331,107 @@ def render_markdown(
 
 
 def main(argv: list[str]) -> int:
-    ap = argparse.ArgumentParser(description="Extract a catalog of vLLM custom ops exposed to Python.")
+    if argv[:1] == ["query"]:
+        return query_main(argv[1:])
+
+    ap = argparse.ArgumentParser(
+        description="Extract a catalog of vLLM custom ops exposed to Python.",
+        epilog="Use `%(prog)s query --help` for indexed op lookups.",
+    )
     ap.add_argument("--repo", default=str(Path.home() / "vllm"), help="Path to vLLM git repo")
-    ap.add_argument("--out", default="-", help="Output markdown path (default: '-', stdout)")
+    ap.add_argument("--out", default="-", help="Output path (default: '-', stdout)")
+    ap.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Parse files across N worker processes (default: 1, serial; 0 = one per CPU).",
+    )
+    ap.add_argument(
+        "--cache-dir",
+        default=str(_DEFAULT_CACHE_DIR),
+        help="Directory for the incremental per-file parse cache (default: <notes>/.cache)",
+    )
+    ap.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Parse every file from scratch and neither read nor write the cache.",
+    )
+    ap.add_argument(
+        "--rev",
+        default=None,
+        help=(
+            "Scan this commit/tag/branch straight from the git object store instead of the "
+            "working tree (e.g. v0.6.0, origin/main). Nothing is checked out."
+        ),
+    )
+    ap.add_argument(
+        "--format",
+        choices=("markdown", "json", "ndjson"),
+        default="markdown",
+        help="Output format (default: markdown). json/ndjson write a reloadable catalog.",
+    )
+    ap.add_argument(
+        "--from-catalog",
+        default=None,
+        help="Render from a previously written JSON/NDJSON catalog instead of scanning.",
+    )
+    ap.add_argument(
+        "--resolve-calls",
+        action="store_true",
+        help=(
+            "AST-parse vllm/**.py to follow aliases and _custom_ops wrappers, and list each "
+            "native op's transitive Python call sites."
+        ),
+    )
+    ap.add_argument(
+        "--platforms",
+        default=None,
+        help=(
+            "Comma-separated configurations to evaluate from the same scan, e.g. "
+            f"cuda,rocm,cpu-avx512 (known: {', '.join(PLATFORMS)}; add macros with "
+            "name+MACRO[=VALUE]). Adds an op x platform availability matrix (json/ndjson: "
+            "'platforms' and 'availability' records)."
+        ),
+    )
     args = ap.parse_args(argv)
 
-    repo = Path(args.repo).expanduser().resolve()
+    platforms = None
+    if args.platforms:
+        try:
+            platforms = [parse_platform(spec) for spec in args.platforms.split(",") if spec.strip()]
+        except ValueError as e:
+            ap.error(str(e))
+
+    if args.from_catalog:
+        catalog = Catalog.load(Path(args.from_catalog).expanduser().resolve())
+    else:
+        repo = Path(args.repo).expanduser().resolve()
+
+        source: WorktreeSource | GitRevSource
+        if args.rev:
+            source = GitRevSource(repo, args.rev)
+        else:
+            source = WorktreeSource(repo)
 
-    cpp_ops, native_sources = extract_cpp_ops_from_repo(repo)
-    python_agg, python_per_file = extract_python_ops_from_repo(repo)
+        cache = None
+        if not args.no_cache:
+            cache = ParseCache.for_repo(Path(args.cache_dir).expanduser().resolve(), repo)
 
-    md = render_markdown(repo, cpp_ops, native_sources, python_agg, python_per_file)
+        try:
+            catalog = build_catalog(
+                repo, jobs=args.jobs, cache=cache, source=source, resolve_calls=args.resolve_calls
+            )
+        finally:
+            source.close()
+
+        if cache is not None:
+            cache.save()
+
+    if args.format == "markdown":
+        md = render_markdown(catalog, platforms)
+    else:
+        md = catalog.dumps(args.format, platforms)
 
     if args.out == "-":
         print(md, end="")
@@ -17,16 +17,29 @@ Notes:
 from __future__ import annotations
 
 import argparse
+import copy
+import csv
+import fnmatch
+import hashlib
+import heapq
 import json
+import multiprocessing
 import os
 import re
+import sqlite3
 import subprocess
 import sys
+import tempfile
+import threading
 from collections import Counter, defaultdict
+from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator
+
+from git_batch import GitBatch
 
 
 DEFAULT_RULES = [
@@ -52,6 +65,102 @@ DEFAULT_RULES = [
 ]
 
 
+# Persistent per-repo commit store (see CommitStore); shares the notes repo's .cache/ with
+# the other scripts.
+_DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[1] / ".cache"
+_STORE_VERSION = "1"
+
+_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS commits (
+    sha TEXT PRIMARY KEY,
+    short TEXT NOT NULL,
+    date TEXT NOT NULL,
+    author TEXT NOT NULL,
+    subject TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    sha TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    added INTEGER,
+    deleted INTEGER,
+    old_path TEXT,
+    PRIMARY KEY (sha, seq)
+);
+CREATE TABLE IF NOT EXISTS blame (
+    path TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    rev TEXT NOT NULL,
+    author TEXT NOT NULL,
+    lines INTEGER NOT NULL,
+    PRIMARY KEY (path, blob, rev, author)
+);
+"""
+
+# SQLite's default limit on bound parameters is 999 in older builds.
+_SQL_BATCH = 500
+
+# --jobs splits the range into about this many shards per worker (for load balancing), but
+# never into shards so small that git's startup cost dominates.
+_SHARDS_PER_JOB = 4
+_MIN_SHARD = 64
+
+
+# --bucket period sizes; labels sort chronologically as strings.
+_BUCKETS = ("week", "month")
+# Top files per (period, area) kept in the --csv output.
+_SERIES_TOP_FILES = 3
+
+# --functions: file types whose hunks are attributed to functions, mapped to git's
+# built-in funcname driver (enabled through a temporary core.attributesFile).
+_FUNCTION_DRIVERS = {
+    **dict.fromkeys((".c", ".cc", ".cpp", ".cxx", ".cu", ".cuh", ".h", ".hh", ".hpp", ".inl"), "cpp"),
+    ".py": "python",
+}
+_HUNK_HEADER_RE = re.compile(r"@@ -\d+(?:,(\d+))? \+\d+(?:,(\d+))? @@ ?(.*)")
+_PY_DEF_RE = re.compile(r"\s*(?:async\s+)?(?:def|class)\s+(\w+)")
+_CPP_CALLABLE_RE = re.compile(r"([A-Za-z_~][\w:~]*)\s*\(")
+_CPP_SCOPE_RE = re.compile(r"\b(class|struct|union|enum|namespace)\s+([A-Za-z_][\w:]*)")
+# Parenthesized words in a signature line that are not the function's name.
+_NOT_FUNCTION_NAMES = {
+    "__attribute__",
+    "__declspec",
+    "__launch_bounds__",
+    "alignas",
+    "decltype",
+    "if",
+    "for",
+    "while",
+    "switch",
+    "return",
+    "sizeof",
+    "static_assert",
+}
+
+# --cochange: file pairs are only counted among this many most-touched files.
+_COCHANGE_TOP_FILES = 200
+# Kept commits are stored as file-id tuples until there are this many; then only files in
+# the running top _COCHANGE_POOL are kept, and their pairs are counted as commits arrive.
+_COCHANGE_HISTORY = 20_000
+_COCHANGE_POOL = 4 * _COCHANGE_TOP_FILES
+
+# --density: files/areas smaller than this (in the chosen unit) are left out, so one-line
+# files such as version stubs don't drown out real hot spots.
+_DENSITY_MIN_SIZE = {"lines": 20, "bytes": 1024}
+# Densities are reported per line, or per KiB (per byte rounds to zero).
+_DENSITY_PER = {"lines": (1, "line"), "bytes": (1024, "KiB")}
+
+# --owners: blame processes run at once (unless --jobs asks for more), and owners shown per file.
+_BLAME_WORKERS = 4
+_OWNERS_SHOWN = 3
+
+# --approx: default Space-Saving counters per hot-files/areas table, and the cap on the
+# path classifier's memo so memory stays fixed on huge histories.
+_APPROX_COUNTERS = 4096
+_APPROX_MEMO = 1 << 16
+
+
 @dataclass(frozen=True)
 class Rule:
     name: str
@@ -66,6 +175,69 @@ def run_git(repo: Path, args: list[str]) -> str:
         raise RuntimeError(e.output.strip() or f"git command failed: {' '.join(cmd)}") from e
 
 
+def stream_git(
+    repo: Path,
+    args: list[str],
+    sep: str,
+    chunk_size: int = 1 << 16,
+    stdin_lines: list[str] | None = None,
+) -> Iterator[str]:
+    """Yield git's stdout split on sep, reading the pipe incrementally.
+
+    Only the record being assembled is held in memory, so the footprint does not grow with
+    the size of the output (e.g. `git log --numstat` over the full history). stdin_lines
+    (e.g. shas for `--stdin`) are fed from a thread so neither pipe can fill up and block.
+    """
+
+    cmd = ["git", "-C", str(repo), "--no-pager", *args]
+    proc = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE if stdin_lines is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+    )
+    assert proc.stdout is not None and proc.stderr is not None
+    if stdin_lines is not None:
+        assert proc.stdin is not None
+
+        def feed(pipe=proc.stdin) -> None:
+            try:
+                for line in stdin_lines:
+                    pipe.write(line + "\n")
+            except BrokenPipeError:
+                pass
+            finally:
+                try:
+                    pipe.close()
+                except BrokenPipeError:
+                    pass
+
+        threading.Thread(target=feed, daemon=True).start()
+    try:
+        pending = ""
+        while True:
+            chunk = proc.stdout.read(chunk_size)
+            if not chunk:
+                break
+            pending += chunk
+            *records, pending = pending.split(sep)
+            yield from records
+        if pending:
+            yield pending
+        err = proc.stderr.read()
+        if proc.wait() != 0:
+            raise RuntimeError(err.strip() or f"git command failed: {' '.join(cmd)}")
+    finally:
+        # The consumer may stop early; don't leave git blocked on a full pipe.
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+
+
 def _normalize_github_base(remote_url: str) -> str | None:
     s = (remote_url or "").strip()
     if not s:
@@ -130,6 +302,221 @@ def bucket_path(path: str, rules: list[Rule]) -> str:
     return "other"
 
 
+_REGEX_META = set(".^$*+?{}[]\\|()")
+
+
+def _literal_prefix(pattern: str) -> str | None:
+    """The literal text of a `^...` alternative made only of plain/escaped characters."""
+
+    out: list[str] = []
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            if i + 1 >= len(pattern) or pattern[i + 1].isalnum():
+                return None  # \d, \1, \A, ... are not literals
+            out.append(pattern[i + 1])
+            i += 2
+            continue
+        if ch in _REGEX_META:
+            return None
+        out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+_SCAN = r"[\s\S]*?"
+
+
+def _anchored(pattern: str) -> bool:
+    """True if every match of `pattern` starts at position 0 (leading `^`, no top-level `|`)."""
+
+    if not pattern.startswith("^"):
+        return False
+    depth = 0
+    in_class = False
+    i = 1
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = ch != "]"
+        elif ch == "[":
+            in_class = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            return False
+        i += 1
+    return True
+
+
+def _split_alternatives(pattern: str) -> list[str] | None:
+    """Top-level alternatives of "(a|b)" / "(?:a|b)" spanning the whole pattern, else None."""
+
+    if pattern.startswith("(?:"):
+        body_start = 3
+    elif pattern.startswith("(") and not pattern.startswith("(?"):
+        body_start = 1
+    else:
+        return None
+    alts: list[str] = []
+    depth = 0
+    in_class = False
+    start = body_start
+    i = body_start
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = ch != "]"
+        elif ch == "[":
+            in_class = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            if depth == 0:
+                if i != len(pattern) - 1:
+                    return None
+                alts.append(pattern[start:i])
+                return alts
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            alts.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    return None
+
+
+class PathClassifier:
+    """Compiled equivalent of bucket_path() for many paths and many rules.
+
+    - `^literal` rules (and the literal alternatives of `^(a|b|...)`) go into a character
+      trie, so a path only walks its own prefix instead of testing every rule.
+    - All other patterns are combined into one anchored alternation of lookaheads,
+      `(?=[\\s\\S]*?(?:p0))(?P<_r0>)|(?=[\\s\\S]*?(?:p1))(?P<_r1>)|...`, which the regex
+      engine tries in rule order. That keeps first-match semantics, which a plain `p0|p1`
+      search would not: it reports the leftmost match rather than the first rule. Patterns
+      that can't be embedded (inline global flags, backreferences, clashing group names)
+      are tested one at a time instead.
+    - Results are memoized per distinct path.
+
+    The winning rule is the lowest-indexed one that matches, exactly as in bucket_path().
+    """
+
+    def __init__(self, rules: list[Rule], max_memo: int | None = None):
+        self.rules = rules
+        self._trie: dict = {}
+        self._memo: dict[str, str] = {}
+        self._max_memo = max_memo
+        regex_parts: list[tuple[int, str]] = []
+        for index, rule in enumerate(rules):
+            pattern = rule.pattern.pattern
+            leftover: list[str] = []
+            if pattern.startswith("^") and rule.pattern.flags & ~re.UNICODE == 0:
+                body = pattern[1:]
+                alts = _split_alternatives(body) or [body]
+                for alt in alts:
+                    prefix = _literal_prefix(alt)
+                    if prefix is None:
+                        leftover.append(alt)
+                    else:
+                        self._add_prefix(prefix, index)
+                if len(leftover) == len(alts):
+                    leftover = []
+                    regex_parts.append((index, pattern))
+                elif leftover:
+                    regex_parts.append((index, "^(?:" + "|".join(leftover) + ")"))
+            else:
+                regex_parts.append((index, pattern))
+
+        self._combined: re.Pattern[str] | None = None
+        self._sequential: list[tuple[int, re.Pattern[str]]] = []
+        # A trie hit ranked before every regex rule settles the path without any regex work.
+        self._first_regex = regex_parts[0][0] if regex_parts else len(rules)
+        if regex_parts:
+            # `^`-anchored patterns can only match at 0, so they skip the scanning prefix.
+            alternation = "|".join(
+                f"(?={'' if _anchored(pattern) else _SCAN}(?:{pattern}))(?P<_r{index}>)"
+                for index, pattern in regex_parts
+            )
+            combinable = all(
+                rules[index].pattern.flags & ~re.UNICODE == 0
+                and not re.search(r"\\[1-9]|\(\?P=|\(\?[aiLmsux]+\)", pattern)
+                for index, pattern in regex_parts
+            )
+            try:
+                if not combinable:
+                    raise re.error("not combinable")
+                self._combined = re.compile(f"^(?:{alternation})")
+            except re.error:
+                self._sequential = [(index, rules[index].pattern) for index, _ in regex_parts]
+
+    def _add_prefix(self, prefix: str, index: int) -> None:
+        node = self._trie
+        for ch in prefix:
+            node = node.setdefault(ch, {})
+        # "" marks "a rule's prefix ends here"; keep the lowest (first) rule index.
+        node[""] = min(node.get("", index), index)
+
+    def _rule_index(self, path: str) -> int | None:
+        best: int | None = None
+        node = self._trie
+        if "" in node:
+            best = node[""]
+        for ch in path:
+            node = node.get(ch)
+            if node is None:
+                break
+            hit = node.get("")
+            if hit is not None and (best is None or hit < best):
+                best = hit
+
+        if best is not None and best < self._first_regex:
+            return best
+        if self._combined is not None:
+            m = self._combined.match(path)
+            if m is not None:
+                hit = int(m.lastgroup[2:])
+                if best is None or hit < best:
+                    best = hit
+        else:
+            for index, pattern in self._sequential:
+                if best is not None and index > best:
+                    break
+                if pattern.search(path):
+                    best = index
+                    break
+        return best
+
+    def classify(self, path: str) -> str:
+        area = self._memo.get(path)
+        if area is None:
+            index = self._rule_index(path)
+            if index is not None:
+                area = self.rules[index].name
+            elif path.startswith("vllm/"):
+                parts = path.split("/")
+                area = "vllm/" + parts[1] if len(parts) > 1 else "vllm"
+            else:
+                area = "other"
+            if self._max_memo is not None and len(self._memo) >= self._max_memo:
+                self._memo.clear()
+            self._memo[path] = area
+        return area
+
+    __call__ = classify
+
+    def classify_many(self, paths: Iterable[str]) -> list[str]:
+        return [self.classify(path) for path in paths]
+
+
 def load_pathspec(paths: list[str], paths_file: Path | None) -> list[str]:
     pathspec: list[str] = []
     for p in paths:
@@ -161,202 +548,1358 @@ def _append_pathspec(args: list[str], pathspec: list[str]) -> list[str]:
     return [*args, "--", *pathspec]
 
 
-def iter_short_commits(
+# One `git log` pass yields everything the report needs. Header fields are split by \x1f and
+# each commit starts with \x1e; with -z the numstat entries are NUL-terminated and renames
+# carry both paths verbatim (no `{old => new}` shorthand to undo).
+_LOG_FIELDS = ("%H", "%h", "%ad", "%an", "%s")
+_LOG_FORMAT = "%x1e" + "%x1f".join(_LOG_FIELDS)
+
+_KEYWORD_STOPWORDS = {
+    "the",
+    "a",
+    "an",
+    "and",
+    "or",
+    "to",
+    "of",
+    "in",
+    "on",
+    "for",
+    "with",
+    "without",
+    "by",
+    "from",
+    "into",
+    "as",
+    "is",
+    "are",
+    "be",
+    "fix",
+    "fixes",
+    "fixed",
+    "bug",
+    "bugfix",
+    "add",
+    "adds",
+    "added",
+    "remove",
+    "removed",
+    "update",
+    "updates",
+    "updated",
+    "refactor",
+    "refactors",
+    "refactored",
+    "improve",
+    "improves",
+    "improved",
+    "make",
+    "makes",
+    "made",
+    "support",
+    "supports",
+    "supporting",
+    "enable",
+    "enabled",
+    "disable",
+    "disabled",
+}
+
+
+@dataclass(frozen=True)
+class FileChange:
+    path: str
+    # None for binary changes (numstat reports `-`).
+    added: int | None
+    deleted: int | None
+    # Source path when git detected a rename.
+    old_path: str | None = None
+
+    @property
+    def churn(self) -> int | None:
+        if self.added is None or self.deleted is None:
+            return None
+        return self.added + self.deleted
+
+
+@dataclass(frozen=True)
+class Commit:
+    sha: str
+    short: str
+    date: str
+    author: str
+    subject: str
+    files: tuple[FileChange, ...]
+
+
+def _parse_numstat_z(body: str) -> list[FileChange]:
+    files: list[FileChange] = []
+    tokens = body.split("\0")
+    i = 0
+    while i < len(tokens):
+        entry = tokens[i].strip("\n")
+        i += 1
+        if not entry:
+            continue
+        parts = entry.split("\t")
+        if len(parts) != 3:
+            continue
+        added_s, deleted_s, path = parts
+        old_path = None
+        if not path:
+            # Rename/copy: the old and new paths follow as their own NUL-terminated fields.
+            if i + 1 >= len(tokens):
+                break
+            old_path, path = tokens[i], tokens[i + 1]
+            i += 2
+        if added_s == "-" or deleted_s == "-":
+            files.append(FileChange(path, None, None, old_path))
+            continue
+        try:
+            files.append(FileChange(path, int(added_s), int(deleted_s), old_path))
+        except ValueError:
+            continue
+    return files
+
+
+def _parse_log_record(record: str) -> Commit | None:
+    header, _, body = record.partition("\n")
+    fields = header.split("\x1f")
+    if len(fields) != len(_LOG_FIELDS):
+        return None
+    sha, short, date, author, subject = (f.strip() for f in fields)
+    return Commit(sha, short, date, author, subject, tuple(_parse_numstat_z(body)))
+
+
+def iter_commits(
     repo: Path,
     n: int,
     rev: str,
     include_merges: bool,
     pathspec: list[str],
-) -> list[tuple[str, str, str, str]]:
-    fmt = "%H%x09%h%x09%ad%x09%s"
+) -> Iterator[Commit]:
+    """Stream the newest n commits of rev with their per-file numstat from a single `git log`.
+
+    Commits are parsed as they arrive on the pipe; callers aggregate and drop them, so
+    memory stays flat regardless of n.
+    """
+
     # Use an unambiguous timestamp format for reports.
-    args = ["log", f"-{n}", rev, "--date=iso-strict", f"--pretty=format:{fmt}"]
+    args = ["log", f"-{n}", rev, "-z", "--numstat", "--date=iso-strict", f"--pretty=format:{_LOG_FORMAT}"]
     if not include_merges:
         args.insert(1, "--no-merges")
-    out = run_git(repo, _append_pathspec(args, pathspec))
 
-    commits: list[tuple[str, str, str, str]] = []
-    for line in out.splitlines():
-        if "\t" not in line:
-            continue
-        parts = line.split("\t", 3)
-        if len(parts) != 4:
-            continue
-        full_sha, short_sha, dt, subj = parts
-        commits.append((full_sha.strip(), short_sha.strip(), dt.strip(), subj.strip()))
-    return commits
+    for record in stream_git(repo, _append_pathspec(args, pathspec), "\x1e"):
+        commit = _parse_log_record(record)
+        if commit is not None:
+            yield commit
 
 
-def iter_subjects(
+def rev_list(
     repo: Path,
-    n: int,
+    n: int | None,
     rev: str,
     include_merges: bool,
     pathspec: list[str],
+    exclude: tuple[str, ...] = (),
 ) -> list[str]:
-    fmt = "%H%x09%s"
-    args = ["log", f"-{n}", rev, f"--pretty=format:{fmt}"]
+    """Shas `git log` would show for the same arguments, newest first, without any diffs.
+
+    n=None lists the whole range; `exclude` revs are subtracted (`^rev`).
+    """
+
+    args = ["rev-list", rev, *(f"^{x}" for x in exclude)]
+    if n is not None:
+        args.insert(1, f"--max-count={n}")
     if not include_merges:
         args.insert(1, "--no-merges")
-    out = run_git(repo, _append_pathspec(args, pathspec))
+    return run_git(repo, _append_pathspec(args, pathspec)).split()
+
+
+def iter_commits_by_sha(repo: Path, shas: list[str], pathspec: list[str] | None = None) -> Iterator[Commit]:
+    """Numstat for exactly these commits, in the given order (unfiltered unless pathspec)."""
 
-    subjects: list[str] = []
-    for line in out.splitlines():
-        if "\t" not in line:
+    args = [
+        "log",
+        "--no-walk=unsorted",
+        "--stdin",
+        "-z",
+        "--numstat",
+        "--date=iso-strict",
+        f"--pretty=format:{_LOG_FORMAT}",
+    ]
+    for record in stream_git(repo, _append_pathspec(args, pathspec or []), "\x1e", stdin_lines=shas):
+        commit = _parse_log_record(record)
+        if commit is not None:
+            yield commit
+
+
+def pathspec_matcher(pathspec: list[str]):
+    """A predicate equivalent to git's default pathspec matching, or None if pathspec uses
+    magic (`:(...)`, `:!`) this doesn't implement. An empty pathspec matches everything."""
+
+    if any(p.startswith(":") for p in pathspec):
+        return None
+    literal: list[str] = []
+    wild: list[str] = []
+    for p in pathspec:
+        p = p.strip("/") if p not in ("/", ".") else ""
+        (wild if any(ch in p for ch in "*?[") else literal).append(p)
+
+    def matches(path: str) -> bool:
+        if not pathspec:
+            return True
+        for p in literal:
+            if not p or path == p or path.startswith(p + "/"):
+                return True
+        # Like git, `*` also matches `/`, and a pattern matching a leading directory matches
+        # everything below it.
+        return any(fnmatch.fnmatchcase(path, p) or fnmatch.fnmatchcase(path, p + "/*") for p in wild)
+
+    return matches
+
+
+class CommitStore:
+    """Persistent per-repo SQLite store of commit metadata and full per-file numstat.
+
+    A commit's subject, date and numstat never change, so each one is asked from git once;
+    later reports only fetch commits the store hasn't seen and read the rest from disk.
+    """
+
+    def __init__(self, path: Path, repo: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Parallel fetches (--jobs) write from several processes; wait for the lock.
+        self.conn = sqlite3.connect(str(path), timeout=300)
+        self.conn.executescript(_STORE_SCHEMA)
+        # Blames cached before they were keyed by commit can't be trusted; drop just those.
+        if "rev" not in {row[1] for row in self.conn.execute("PRAGMA table_info(blame)")}:
+            self.conn.execute("DROP TABLE blame")
+            self.conn.executescript(_STORE_SCHEMA)
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        if meta.get("version") != _STORE_VERSION or meta.get("repo") != str(repo):
+            for table in ("meta", "commits", "files", "blame"):
+                self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.executescript(_STORE_SCHEMA)
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO meta (key, value) VALUES (?, ?)",
+                    [("version", _STORE_VERSION), ("repo", str(repo))],
+                )
+
+    @classmethod
+    def for_repo(cls, cache_dir: Path, repo: Path) -> CommitStore:
+        slug = f"{repo.name}-{hashlib.sha1(str(repo).encode()).hexdigest()[:12]}"
+        return cls(cache_dir / f"git-activity-{slug}.sqlite", repo)
+
+    def missing(self, shas: list[str]) -> list[str]:
+        known: set[str] = set()
+        for i in range(0, len(shas), _SQL_BATCH):
+            batch = shas[i : i + _SQL_BATCH]
+            marks = ",".join("?" * len(batch))
+            known.update(
+                sha for (sha,) in self.conn.execute(f"SELECT sha FROM commits WHERE sha IN ({marks})", batch)
+            )
+        return [sha for sha in shas if sha not in known]
+
+    def add(self, commit: Commit) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO commits (sha, short, date, author, subject) VALUES (?, ?, ?, ?, ?)",
+            (commit.sha, commit.short, commit.date, commit.author, commit.subject),
+        )
+        self.conn.execute("DELETE FROM files WHERE sha = ?", (commit.sha,))
+        self.conn.executemany(
+            "INSERT INTO files (sha, seq, path, added, deleted, old_path) VALUES (?, ?, ?, ?, ?, ?)",
+            [(commit.sha, i, f.path, f.added, f.deleted, f.old_path) for i, f in enumerate(commit.files)],
+        )
+
+    def fetch(self, repo: Path, shas: list[str], jobs: int = 1) -> int:
+        """Ask git for the commits among shas that aren't stored yet; returns how many.
+
+        With jobs > 1 the missing commits are sharded across worker processes, each running
+        its own `git log` and writing its shard straight into the store.
+        """
+
+        missing = self.missing(shas)
+        shards = shard(missing, jobs)
+        if len(shards) > 1:
+            self.conn.commit()
+            with _worker_pool(jobs) as ex:
+                list(ex.map(_fetch_shard_task, [(self.path, repo, s) for s in shards]))
+            return len(missing)
+
+        for i, commit in enumerate(iter_commits_by_sha(repo, missing), 1):
+            self.add(commit)
+            if i % 1000 == 0:
+                self.conn.commit()
+        self.conn.commit()
+        return len(missing)
+
+    def commits(self, shas: list[str]) -> Iterator[Commit]:
+        """Stored commits in the order of shas, read in batches."""
+
+        for i in range(0, len(shas), _SQL_BATCH):
+            batch = shas[i : i + _SQL_BATCH]
+            marks = ",".join("?" * len(batch))
+            files: dict[str, list[FileChange]] = defaultdict(list)
+            for sha, path, added, deleted, old_path in self.conn.execute(
+                f"SELECT sha, path, added, deleted, old_path FROM files WHERE sha IN ({marks})"
+                " ORDER BY sha, seq",
+                batch,
+            ):
+                files[sha].append(FileChange(path, added, deleted, old_path))
+            rows = {
+                row[0]: row
+                for row in self.conn.execute(
+                    f"SELECT sha, short, date, author, subject FROM commits WHERE sha IN ({marks})", batch
+                )
+            }
+            for sha in batch:
+                row = rows.get(sha)
+                if row is not None:
+                    yield Commit(*row, files=tuple(files.get(sha, ())))
+
+    def blame(self, rev: str, keys: list[tuple[str, str]]) -> dict[tuple[str, str], list[tuple[str, int]]]:
+        """Cached line counts per author for (path, blob) keys at commit rev; absent keys are
+        not cached."""
+
+        out: dict[tuple[str, str], list[tuple[str, int]]] = {}
+        for path, blob in keys:
+            rows = self.conn.execute(
+                "SELECT author, lines FROM blame WHERE path = ? AND blob = ? AND rev = ? "
+                "ORDER BY lines DESC, author",
+                (path, blob, rev),
+            ).fetchall()
+            if rows:
+                out[path, blob] = [(author, lines) for author, lines in rows]
+        return out
+
+    def add_blame(self, rev: str, path: str, blob: str, owners: list[tuple[str, int]]) -> None:
+        self.conn.execute("DELETE FROM blame WHERE path = ? AND blob = ? AND rev = ?", (path, blob, rev))
+        self.conn.executemany(
+            "INSERT INTO blame (path, blob, rev, author, lines) VALUES (?, ?, ?, ?, ?)",
+            [(path, blob, rev, author, lines) for author, lines in owners],
+        )
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def blame_owners(repo: Path, rev: str, path: str) -> list[tuple[str, int]]:
+    """Lines of path at rev per author, most first, from `git blame --incremental`.
+
+    The incremental format prints each commit's author only with its first line group, so
+    authors are remembered by commit; every group ends with a `filename` line.
+    """
+
+    authors: dict[str, str] = {}
+    lines: Counter[str] = Counter()
+    sha: str | None = None
+    count = 0
+    for line in stream_git(repo, ["blame", "--incremental", rev, "--", path], "\n"):
+        if not line:
             continue
-        _sha, subj = line.split("\t", 1)
-        subjects.append(subj.strip())
-    return subjects
+        if sha is None:
+            fields = line.split()
+            sha, count = fields[0], int(fields[3])
+        elif line.startswith("author ") and sha not in authors:
+            authors[sha] = line[len("author ") :]
+        elif line.startswith("filename "):
+            lines[authors.get(sha, sha[:12])] += count
+            sha = None
+    return sorted(lines.items(), key=lambda kv: (-kv[1], kv[0]))
+
+
+def file_owners(
+    repo: Path,
+    rev: str,
+    paths: list[str],
+    store: CommitStore | None,
+    workers: int = _BLAME_WORKERS,
+) -> dict[str, list[tuple[str, int]]]:
+    """Blame-based line ownership at rev for each path that exists there.
+
+    Blob shas come from one pipelined `cat-file --batch-check`. Blames are cached in the
+    store by (path, blob sha, tip commit sha). The commit is part of the key because the
+    same blob can have a different history at another commit: after a revert, its lines
+    belong to the reverting commit. So re-runs and other windows at the same tip skip
+    `git blame`, and a new tip blames again. The misses run `git blame --incremental` on a
+    bounded thread pool; the work happens in the git processes, so threads are enough.
+    """
+
+    commit = run_git(repo, ["rev-parse", "--verify", f"{rev}^{{commit}}"]).strip()
+    infos = GitBatch.for_repo(repo).info(f"{commit}:{path}" for path in paths)
+    blobs = {path: info.sha for path, info in zip(paths, infos) if info is not None and info.type == "blob"}
+    cached = store.blame(commit, list(blobs.items())) if store is not None else {}
+    out = {path: cached[path, blob] for path, blob in blobs.items() if (path, blob) in cached}
+    todo = [path for path in blobs if path not in out]
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+            for path, owners in zip(todo, ex.map(lambda p: blame_owners(repo, commit, p), todo)):
+                out[path] = owners
+                if store is not None:
+                    store.add_blame(commit, path, blobs[path], owners)
+        if store is not None:
+            store.conn.commit()
+    return out
+
+
+def owners_cell(owners: list[tuple[str, int]] | None) -> str:
+    """ "Alice 62%, Bob 20%, Carol 9%" for the top owners of a file (— if gone at the tip)."""
+
+    if not owners:
+        return "—"
+    total = sum(lines for _, lines in owners)
+    return ", ".join(f"{author} {100 * lines / total:.0f}%" for author, lines in owners[:_OWNERS_SHOWN])
+
+
+def _resolve_jobs(jobs: int) -> int:
+    # 0 (or negative) means "one worker per CPU".
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def _worker_pool(jobs: int) -> ProcessPoolExecutor:
+    """Process pool for --jobs.
+
+    Workers are forked from the main thread. When main() is called from another thread
+    they are spawned instead: other threads may hold locks (cat-file pipes, SQLite, stdio)
+    that a forked child would inherit locked.
+    """
+
+    context = None
+    if threading.current_thread() is not threading.main_thread():
+        context = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=_resolve_jobs(jobs), mp_context=context)
+
+
+def shard(shas: list[str], jobs: int) -> list[list[str]]:
+    """Split shas into contiguous, disjoint shards (in order) for jobs workers."""
+
+    jobs = _resolve_jobs(jobs)
+    if jobs <= 1 or len(shas) < 2 * _MIN_SHARD:
+        return [shas] if shas else []
+    count = min(jobs * _SHARDS_PER_JOB, len(shas) // _MIN_SHARD)
+    size = -(-len(shas) // count)
+    return [shas[i : i + size] for i in range(0, len(shas), size)]
+
+
+def _fetch_shard_task(item: tuple[Path, Path, list[str]]) -> None:
+    # Process-pool entry point: fetch one shard of missing commits into the store.
+    store_path, repo, shas = item
+    store = CommitStore(store_path, repo)
+    try:
+        for i, commit in enumerate(iter_commits_by_sha(repo, shas), 1):
+            store.add(commit)
+            if i % 1000 == 0:
+                store.conn.commit()
+        store.conn.commit()
+    finally:
+        store.close()
+
+
+def _shard_stats_task(
+    item: tuple[
+        Path, list[str], list[str], list[Rule], int, str | None, int | None, CochangeOptions | None, int
+    ],
+) -> ActivityStats:
+    # Process-pool entry point: aggregate one shard. `tally` is how many of the shard's
+    # commits fall inside -n (the rest only feed the recent-commits table).
+    repo, shas, pathspec, rules, show_commits, bucket, approx, cochange, tally = item
+    stats = ActivityStats(
+        rules, show_commits=show_commits, bucket=bucket, approx=approx, cochange=cochange
+    )
+    for i, commit in enumerate(iter_commits_by_sha(repo, shas, pathspec)):
+        if i < tally:
+            stats.add_commit(commit)
+        else:
+            stats.add_recent(commit)
+    return stats
+
+
+def collect_stats_parallel(
+    repo: Path,
+    shas: list[str],
+    n: int,
+    pathspec: list[str],
+    rules: list[Rule],
+    show_commits: int,
+    jobs: int,
+    bucket: str | None = None,
+    approx: int | None = None,
+    cochange: CochangeOptions | None = None,
+) -> ActivityStats:
+    """Aggregate shas (newest first, as from rev_list) across worker processes.
+
+    Each worker runs `git log --no-walk --stdin` over one contiguous shard; partials are
+    merged in shard order, which reproduces the serial first-seen order of every Counter
+    and therefore the exact same tables (with --approx, merged sketches keep their error
+    bounds but may differ from a serial sketch).
+    """
+
+    items = []
+    start = 0
+    for s in shard(shas, jobs):
+        items.append(
+            (
+                repo,
+                s,
+                pathspec,
+                rules,
+                show_commits,
+                bucket,
+                approx,
+                cochange,
+                max(0, min(len(s), n - start)),
+            )
+        )
+        start += len(s)
+    stats = ActivityStats(
+        rules, show_commits=show_commits, bucket=bucket, approx=approx, cochange=cochange
+    )
+    if len(items) <= 1:
+        partials = [_shard_stats_task(item) for item in items]
+    else:
+        with _worker_pool(jobs) as ex:
+            partials = list(ex.map(_shard_stats_task, items))
+    for partial in partials:
+        stats.merge(partial)
+    return stats
 
 
-def parse_numstat(
+def iter_commits_stored(
     repo: Path,
     n: int,
     rev: str,
     include_merges: bool,
     pathspec: list[str],
-) -> Iterable[tuple[int | None, int | None, str]]:
-    # None churn indicates binary change (added/deleted == '-')
-    args = ["log", f"-{n}", rev]
-    if not include_merges:
-        args.insert(1, "--no-merges")
-    args += ["--numstat", "--pretty=format:COMMIT"]
-    out = run_git(repo, _append_pathspec(args, pathspec))
+    store: CommitStore,
+    jobs: int = 1,
+) -> Iterator[Commit]:
+    """Same commits and (pathspec-filtered) numstat as iter_commits(), served from the store.
+
+    `git rev-list` with the same arguments picks the commits (so git's own path limiting and
+    history simplification still decide which commits count); only commits missing from
+    the store are diffed.
+    """
+
+    matches = pathspec_matcher(pathspec)
+    assert matches is not None, "pathspec magic is not supported by the store"
+    shas = rev_list(repo, n, rev, include_merges, pathspec)
+    store.fetch(repo, shas, jobs)
+    if not pathspec:
+        yield from store.commits(shas)
+        return
+
+    batch: list[Commit] = []
+
+    def flush() -> Iterator[Commit]:
+        # A rename with only one side inside the pathspec is reported by a path-limited
+        # `git log` as a plain add/delete with whole-file line counts, which the stored
+        # (unlimited) numstat can't reproduce; ask git again for just those commits.
+        redo = [
+            c.sha
+            for c in batch
+            if any(f.old_path is not None and matches(f.old_path) != matches(f.path) for f in c.files)
+        ]
+        exact = {c.sha: c for c in iter_commits_by_sha(repo, redo, pathspec)} if redo else {}
+        for c in batch:
+            yield exact.get(c.sha) or Commit(
+                c.sha, c.short, c.date, c.author, c.subject, tuple(f for f in c.files if matches(f.path))
+            )
+        batch.clear()
 
-    for line in out.splitlines():
-        if not line.strip() or line.startswith("COMMIT"):
-            continue
-        parts = line.split("\t")
-        if len(parts) != 3:
-            continue
-        added_s, deleted_s, path = parts
-        path = path.strip()
+    for commit in store.commits(shas):
+        batch.append(commit)
+        if len(batch) >= _SQL_BATCH:
+            yield from flush()
+    yield from flush()
 
-        # Normalize rename-ish paths: `a/{old => new}/b.py` → `a/new/b.py` (approx)
-        if "=>" in path:
-            path = path.split("=>")[-1].strip().replace("{", "").replace("}", "")
 
-        if added_s == "-" or deleted_s == "-":
-            yield (None, None, path)
-            continue
-        try:
-            yield (int(added_s), int(deleted_s), path)
-        except ValueError:
+def period_of(commit_date: str, bucket: str) -> str:
+    """Period label of an ISO-8601 commit date: "2025-W07" (ISO week) or "2025-02" (month)."""
+
+    if bucket == "month":
+        return commit_date[:7]
+    year, week, _ = date.fromisoformat(commit_date[:10]).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def period_range(first: str, last: str, bucket: str) -> list[str]:
+    """Every period label from first to last inclusive, so quiet periods show up as zeros."""
+
+    out: list[str] = []
+    if bucket == "month":
+        year, month = int(first[:4]), int(first[5:7])
+        while True:
+            label = f"{year:04d}-{month:02d}"
+            out.append(label)
+            if label >= last:
+                return out
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    day = datetime.strptime(f"{first}-1", "%G-W%V-%u").date()
+    while True:
+        label = period_of(day.isoformat(), bucket)
+        out.append(label)
+        if label >= last:
+            return out
+        day += timedelta(days=7)
+
+
+@dataclass
+class Window:
+    """One report of a --windows run: the newest `n` commits, or every commit since `tag`."""
+
+    label: str
+    title: str
+    n: int | None = None
+    tag: str | None = None
+    # Set for a since: window whose commits are not a prefix of the log (resolve_windows).
+    members: set[str] | None = None
+
+
+def parse_windows(spec: str) -> list[Window]:
+    """Parse "10,50,since:v0.6.0" into windows (duplicates dropped, order kept)."""
+
+    windows: dict[str, Window] = {}
+    for item in (x.strip() for x in spec.split(",")):
+        if not item:
             continue
+        if item.startswith("since:"):
+            tag = item[len("since:") :].strip()
+            if not tag:
+                raise ValueError(f"missing tag in window {item!r}")
+            label = "since-" + (re.sub(r"[^A-Za-z0-9._-]+", "-", tag).strip("-") or "tag")
+            windows.setdefault(label, Window(label, f"commits since {tag}", tag=tag))
+        else:
+            try:
+                n = int(item)
+            except ValueError:
+                raise ValueError(f"bad window {item!r} (expected N or since:TAG)") from None
+            if n <= 0:
+                raise ValueError(f"window size must be positive: {item!r}")
+            windows.setdefault(f"n{n}", Window(f"n{n}", f"last {n} commits", n=n))
+    if not windows:
+        raise ValueError("no windows given")
+    return list(windows.values())
+
+
+def resolve_windows(
+    repo: Path,
+    windows: list[Window],
+    rev: str,
+    include_merges: bool,
+    pathspec: list[str],
+) -> int:
+    """Pin since: windows down and return how many commits of rev's log cover every window.
+
+    `git rev-list` (no diffs) lists each since: range. When it is a prefix of rev's log (the
+    usual linear-history case) the window becomes a plain count window; otherwise it keeps
+    its sha set and is tallied by membership from the same stream.
+    """
+
+    depth = max((w.n for w in windows if w.n is not None), default=0)
+    pending = [w for w in windows if w.n is None]
+    if not pending:
+        return depth
+    order = rev_list(repo, None, rev, include_merges, pathspec)
+    position = {sha: i for i, sha in enumerate(order)}
+    for w in pending:
+        shas = rev_list(repo, None, rev, include_merges, pathspec, exclude=(w.tag,))
+        last = max((position[sha] for sha in shas), default=-1)
+        if last + 1 == len(shas):
+            w.n = len(shas)
+        else:
+            w.members = set(shas)
+        depth = max(depth, last + 1)
+    return depth
+
+
+def collect_windows(
+    commits: Iterable[Commit],
+    windows: list[Window],
+    rules: list[Rule],
+    show_commits: int,
+    bucket: str | None = None,
+    approx: int | None = None,
+    cochange: CochangeOptions | None = None,
+) -> dict[str, ActivityStats]:
+    """Aggregate every window from one pass over `commits` (newest first), keyed by label.
+
+    Count windows are prefixes of the stream: one running ActivityStats is copied as it
+    passes each window's size, so a commit is tallied once however many windows contain it.
+    Membership windows get their own stats. The recent-commits table is the head of the
+    stream for every count window, as in a single-window run.
+    """
+
+    def new_stats() -> ActivityStats:
+        return ActivityStats(
+            rules, show_commits=show_commits, bucket=bucket, approx=approx, cochange=cochange
+        )
 
+    sizes = sorted({w.n for w in windows if w.n is not None})
+    largest = sizes[-1] if sizes else 0
+    running = new_stats()
+    # Snapshots share the (read-only) rules and the classifier's memo with the running stats.
+    shared = {id(running.rules): running.rules, id(running.classify): running.classify}
+    snapshots: dict[int, ActivityStats] = {}
+    by_members = {w.label: new_stats() for w in windows if w.members is not None}
+    members = [(w.members, by_members[w.label]) for w in windows if w.members is not None]
+
+    for i, commit in enumerate(commits):
+        if i < largest:
+            running.add_commit(commit)
+            if i + 1 in sizes and i + 1 != largest:
+                snapshots[i + 1] = copy.deepcopy(running, dict(shared))
+        else:
+            running.add_recent(commit)
+        for shas, stats in members:
+            if commit.sha in shas:
+                stats.add_commit(commit)
+
+    out: dict[str, ActivityStats] = {}
+    for w in windows:
+        if w.members is not None:
+            out[w.label] = by_members[w.label]
+        elif w.n == 0:  # e.g. since:TAG with TAG at the tip
+            out[w.label] = new_stats()
+            out[w.label].recent = list(running.recent)
+        elif w.n == largest:
+            out[w.label] = running
+        else:
+            snapshot = snapshots.get(w.n)
+            if snapshot is None:  # the range ran out before this window filled up
+                snapshot = running
+            else:
+                snapshot.recent = list(running.recent)
+            out[w.label] = snapshot
+    return out
+
+
+@dataclass(frozen=True)
+class FunctionHunk:
+    path: str
+    function: str
+    churn: int
+
+
+def function_name(context: str) -> str:
+    """Name of the function/class in a hunk header's context line (git's funcname match).
+
+    "__global__ void __launch_bounds__(1024) rms_norm_kernel(" -> "rms_norm_kernel",
+    "    async def forward(self, x):" -> "forward", "struct Foo {" -> "struct Foo".
+    """
+
+    m = _PY_DEF_RE.match(context)
+    if m:
+        return m.group(1)
+    for m in _CPP_CALLABLE_RE.finditer(context):
+        if m.group(1) not in _NOT_FUNCTION_NAMES:
+            return m.group(1)
+    m = _CPP_SCOPE_RE.search(context)
+    if m:
+        return f"{m.group(1)} {m.group(2)}"
+    return context.strip()[:80] or "(top level)"
+
+
+def _patch_path(line: str) -> str | None:
+    # "+++ b/path" / "--- a/path" (quoted when core.quotePath still applies); None for /dev/null.
+    path = line[4:].rstrip("\t")
+    if path == "/dev/null":
+        return None
+    if path.startswith('"') and path.endswith('"'):
+        path = path[1:-1].encode("latin-1", "backslashreplace").decode("unicode_escape")
+        path = path.encode("latin-1", "replace").decode("utf-8", "replace")
+    return path[2:]
 
-def parse_name_only(
+
+def iter_function_hunks(
     repo: Path,
     n: int,
     rev: str,
     include_merges: bool,
     pathspec: list[str],
-) -> list[tuple[str, list[str]]]:
-    fmt = "COMMIT%x09%H%x09%s"
-    args = ["log", f"-{n}", rev]
-    if not include_merges:
-        args.insert(1, "--no-merges")
-    args += ["--name-only", f"--pretty=format:{fmt}"]
-    out = run_git(repo, _append_pathspec(args, pathspec))
+) -> Iterator[tuple[str, list[FunctionHunk]]]:
+    """Stream (sha, hunks) for the same commits as iter_commits(), from `git log -p -U0`.
+
+    The patch is read line by line and never held: only the `@@` headers matter. With
+    -U0 a header's line counts are the hunk's churn, and its trailing context is the
+    enclosing function as found by git's cpp/python funcname drivers. Only C/C++/CUDA and
+    Python files are attributed.
+    """
+
+    with tempfile.NamedTemporaryFile("w", prefix="git-activity-", suffix=".attributes") as attrs:
+        attrs.write("".join(f"*{ext} diff={driver}\n" for ext, driver in _FUNCTION_DRIVERS.items()))
+        attrs.flush()
+        args = [
+            "-c",
+            f"core.attributesFile={attrs.name}",
+            "-c",
+            "core.quotePath=false",
+            "log",
+            f"-{n}",
+            rev,
+            "-p",
+            "-U0",
+            "--no-color",
+            "--no-ext-diff",
+            "--format=%x1e%H",
+        ]
+        if not include_merges:
+            args.insert(5, "--no-merges")
+
+        sha: str | None = None
+        hunks: list[FunctionHunk] = []
+        path: str | None = None
+        old_path: str | None = None
+        in_header = False
+        for line in stream_git(repo, _append_pathspec(args, pathspec), "\n"):
+            first = line[:1]
+            if not in_header and first in ("+", "-", " ", "\\", ""):
+                continue  # hunk body
+            if first == "\x1e":
+                if sha is not None:
+                    yield sha, hunks
+                sha, hunks, path = line[1:].strip(), [], None
+            elif line.startswith("diff --git "):
+                in_header, path, old_path = True, None, None
+            elif in_header and line.startswith("--- "):
+                old_path = _patch_path(line)
+            elif in_header and line.startswith("+++ "):
+                path = _patch_path(line) or old_path
+                if path is not None and os.path.splitext(path)[1] not in _FUNCTION_DRIVERS:
+                    path = None
+            elif first == "@":
+                in_header = False
+                m = _HUNK_HEADER_RE.match(line)
+                if m is None or path is None:
+                    continue
+                deleted, added, context = m.groups()
+                churn = (1 if deleted is None else int(deleted)) + (1 if added is None else int(added))
+                hunks.append(FunctionHunk(path, function_name(context), churn))
+        if sha is not None:
+            yield sha, hunks
+
+
+def subject_keywords(subject: str) -> list[str]:
+    s = re.sub(r"^\[[^\]]+\]\s*", "", subject)
+    s = re.sub(r"\(#\d+\)", "", s)
+    return [
+        w
+        for w in re.findall(r"[A-Za-z][A-Za-z0-9_\-/]+", s.lower())
+        if len(w) >= 3 and w not in _KEYWORD_STOPWORDS
+    ]
+
+
+def subject_prefix(subject: str) -> str:
+    m = re.match(r"^\[([^\]]+)\]", subject)
+    return m.group(1) if m else "(no tag)"
+
+
+class ExactCounter(Counter):
+    """Counter with the SpaceSaving interface: exact and unbounded (the default)."""
+
+    exact = True
+
+    def add(self, key: str, weight: int = 1) -> None:
+        self[key] += weight
+
+    def error(self, key: str) -> int:
+        return 0
+
+    def bound(self) -> int:
+        return 0
+
+    def merge(self, other: ExactCounter) -> None:
+        self.update(other)
+
+
+class SpaceSaving:
+    """Space-Saving heavy-hitter sketch (Metwally et al.) over weighted string keys.
+
+    Tracks at most `capacity` keys. When a new key arrives and the table is full, the key
+    with the smallest count is evicted and the newcomer inherits that count as its error.
+    For total weight N:
+    - each tracked count is an upper bound; the true value is in [count - error, count];
+    - an untracked key's true value is at most bound() <= N / capacity, so every key
+      heavier than N / capacity is tracked and the top-K is right whenever the K-th count
+      minus its error stays above bound().
+    The minimum is found through a lazy heap: entries go stale when a count grows and are
+    refreshed when they reach the top, so add() is O(1) unless it evicts (O(log capacity)).
+    """
+
+    exact = False
+
+    def __init__(self, capacity: int = _APPROX_COUNTERS):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.total = 0
+        self.counts: dict[str, int] = {}
+        self.errors: dict[str, int] = {}
+        self._heap: list[tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def _pop_min(self) -> tuple[int, str]:
+        heap = self._heap
+        while True:
+            count, key = heap[0]
+            current = self.counts[key]
+            if current == count:
+                return heapq.heappop(heap)
+            heapq.heapreplace(heap, (current, key))
+
+    def add(self, key: str, weight: int = 1) -> None:
+        self.total += weight
+        counts = self.counts
+        if key in counts:
+            counts[key] += weight
+            return
+        if len(counts) < self.capacity:
+            counts[key] = weight
+            self.errors[key] = 0
+            heapq.heappush(self._heap, (weight, key))
+            return
+        floor, victim = self._pop_min()
+        del counts[victim]
+        del self.errors[victim]
+        counts[key] = floor + weight
+        self.errors[key] = floor
+        heapq.heappush(self._heap, (floor + weight, key))
+
+    def error(self, key: str) -> int:
+        return self.errors.get(key, 0)
+
+    def bound(self) -> int:
+        """Upper bound on the true value of any key that is not tracked."""
+
+        if len(self.counts) < self.capacity:
+            return 0
+        count, key = self._pop_min()
+        heapq.heappush(self._heap, (count, key))
+        return count
+
+    def most_common(self, n: int | None = None) -> list[tuple[str, int]]:
+        # Stable on ties (dict order), like Counter.most_common().
+        if n is None:
+            return sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)
+        return heapq.nlargest(n, self.counts.items(), key=lambda kv: kv[1])
+
+    def merge(self, other: SpaceSaving) -> None:
+        """Fold in a sketch of other commits (mergeable summaries, Agarwal et al.).
+
+        A key missing from one side may still have had up to that side's bound(), so it
+        is charged as both count and error; the heaviest `capacity` keys are kept.
+        """
+
+        mine, theirs = self.bound(), other.bound()
+        keys = dict.fromkeys([*self.counts, *other.counts])
+        merged = [
+            (
+                key,
+                self.counts.get(key, mine) + other.counts.get(key, theirs),
+                self.errors.get(key, mine) + other.errors.get(key, theirs),
+            )
+            for key in keys
+        ]
+        if len(merged) > self.capacity:
+            keep = {key for key, _, _ in heapq.nlargest(self.capacity, merged, key=lambda t: t[1])}
+            merged = [t for t in merged if t[0] in keep]
+        self.total += other.total
+        self.counts = {key: count for key, count, _ in merged}
+        self.errors = {key: error for key, _, error in merged}
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self._heap)
 
-    commits: list[tuple[str, list[str]]] = []
-    cur_subj: str | None = None
-    cur_files: list[str] = []
 
-    def flush() -> None:
-        nonlocal cur_subj, cur_files
-        if cur_subj is None:
-            return
-        commits.append((cur_subj, cur_files))
-        cur_subj = None
-        cur_files = []
-
-    for line in out.splitlines():
-        if line.startswith("COMMIT\t"):
-            flush()
-            _c, _sha, subj = line.split("\t", 2)
-            cur_subj = subj.strip()
-            cur_files = []
-            continue
-        if line.strip():
-            cur_files.append(line.strip())
-
-    flush()
-    return commits
-
-
-def top_keywords(subjects: Iterable[str], k: int) -> list[tuple[str, int]]:
-    stop = {
-        "the",
-        "a",
-        "an",
-        "and",
-        "or",
-        "to",
-        "of",
-        "in",
-        "on",
-        "for",
-        "with",
-        "without",
-        "by",
-        "from",
-        "into",
-        "as",
-        "is",
-        "are",
-        "be",
-        "fix",
-        "fixes",
-        "fixed",
-        "bug",
-        "bugfix",
-        "add",
-        "adds",
-        "added",
-        "remove",
-        "removed",
-        "update",
-        "updates",
-        "updated",
-        "refactor",
-        "refactors",
-        "refactored",
-        "improve",
-        "improves",
-        "improved",
-        "make",
-        "makes",
-        "made",
-        "support",
-        "supports",
-        "supporting",
-        "enable",
-        "enabled",
-        "disable",
-        "disabled",
+@dataclass(frozen=True)
+class CochangeOptions:
+    # Commits touching more files than this (mass renames, vendoring, reformatting) are
+    # skipped: they couple everything and cost O(files^2).
+    max_files: int = 50
+    # Pairs that changed together in fewer commits than this are not reported.
+    min_support: int = 2
+
+
+@dataclass(frozen=True)
+class CoupledPair:
+    a: str
+    b: str
+    support: int
+    confidence_ab: float  # P(b changes | a changes)
+    confidence_ba: float
+    lift: float
+
+
+def rank_pairs(
+    pairs: Counter[tuple[str, str]],
+    counts: Counter[str],
+    commits: int,
+    min_support: int,
+) -> list[CoupledPair]:
+    """Pairs with support >= min_support, by lift (then support): how much more often the
+    two change together than they would if they changed independently."""
+
+    out = [
+        CoupledPair(
+            a,
+            b,
+            together,
+            together / counts[a],
+            together / counts[b],
+            together * commits / (counts[a] * counts[b]),
+        )
+        for (a, b), together in pairs.items()
+        if together >= min_support
+    ]
+    out.sort(key=lambda p: (-p.lift, -p.support, p.a, p.b))
+    return out
+
+
+def tip_of(rev: str) -> str:
+    """The revision whose tree a --rev describes: B for "A..B" / "A...B" (HEAD if empty)."""
+
+    for sep in ("...", ".."):
+        if sep in rev:
+            return rev.split(sep, 1)[1] or "HEAD"
+    return rev
+
+
+def tree_sizes(repo: Path, rev: str, unit: str, matches=None) -> dict[str, int]:
+    """Size of every regular file at rev in bytes or lines, optionally filtered by path.
+
+    Bytes come straight from one `git ls-tree -r -l`; lines additionally stream the blobs
+    through one pipelined `git cat-file --batch`. No file is stat'ed or read on its own.
+    """
+
+    git = GitBatch.for_repo(repo)
+    entries = [
+        e
+        for e in git.tree_entries(rev)
+        if e.type == "blob" and e.mode != "120000" and e.size is not None and (matches is None or matches(e.path))
+    ]
+    if unit == "bytes":
+        return {e.path: e.size for e in entries}
+    return {
+        e.path: data.count(b"\n") + (1 if data and not data.endswith(b"\n") else 0)
+        for e, data in zip(entries, git.iter_blobs([e.sha for e in entries]))
     }
 
-    words = Counter()
-    for subj in subjects:
-        s = re.sub(r"^\[[^\]]+\]\s*", "", subj)
-        s = re.sub(r"\(#\d+\)", "", s)
-        for w in re.findall(r"[A-Za-z][A-Za-z0-9_\-/]+", s.lower()):
-            if len(w) < 3 or w in stop:
-                continue
-            words[w] += 1
-    return words.most_common(k)
 
+@dataclass(frozen=True)
+class DensityRow:
+    name: str
+    churn: int
+    size: int
+
+    @property
+    def density(self) -> float:
+        return self.churn / self.size
+
+
+@dataclass(frozen=True)
+class ChurnDensity:
+    rev: str
+    unit: str
+    min_size: int
+    files: list[DensityRow]
+    areas: list[DensityRow]
+
+
+def _hot_counter(approx: int | None) -> ExactCounter | SpaceSaving:
+    return SpaceSaving(approx) if approx else ExactCounter()
+
+
+class ActivityStats:
+    """Every table of the report, accumulated one commit at a time."""
+
+    def __init__(
+        self,
+        rules: list[Rule],
+        show_commits: int = 0,
+        bucket: str | None = None,
+        approx: int | None = None,
+        cochange: CochangeOptions | None = None,
+    ):
+        self.rules = rules
+        self.classify = PathClassifier(rules, max_memo=_APPROX_MEMO if approx else None)
+        self.show_commits = show_commits
+        self.bucket = bucket
+        # --approx: Space-Saving sketches with this many counters for the hot areas/files
+        # tables instead of exact counters over every path.
+        self.approx = approx
+        self.commits = 0
+        self.recent: list[Commit] = []
+        self.prefixes: Counter[str] = Counter()
+        self.keywords: Counter[str] = Counter()
+        self.area_freq = _hot_counter(approx)
+        self.area_churn = _hot_counter(approx)
+        self.file_freq = _hot_counter(approx)
+        self.file_churn = _hot_counter(approx)
+        self.area_commits: Counter[str] = Counter()
+        self.area_samples: dict[str, list[str]] = defaultdict(list)
+        # --bucket time series, keyed by period label and (period, area).
+        self.period_commits: Counter[str] = Counter()
+        self.series_commits: Counter[tuple[str, str]] = Counter()
+        self.series_churn: Counter[tuple[str, str]] = Counter()
+        self.series_files: dict[tuple[str, str], Counter[str]] = defaultdict(Counter)
+        # --functions: churn per "path: function", filled from a separate patch pass.
+        self.function_churn: ExactCounter | SpaceSaving | None = None
+        # --density: churn normalized by current size, computed once the window is complete.
+        self.density: ChurnDensity | None = None
+        # --owners: blame line counts per author at the tip for the hot files.
+        self.owners: dict[str, list[tuple[str, int]]] | None = None
+        # --cochange: area pairs are counted as they come; file pairs are counted at the end
+        # over the top files only, so each kept commit is stored as a tuple of file ids.
+        # Past _COCHANGE_HISTORY commits the history is folded into pair counts over a pool
+        # of the most-touched files so far (cochange_file_pairs is set from then on).
+        self.cochange = cochange
+        self.cochange_commits = 0
+        self.cochange_skipped = 0
+        self.cochange_area_counts: Counter[str] = Counter()
+        self.area_pairs: Counter[tuple[str, str]] = Counter()
+        self.cochange_file_ids: dict[str, int] = {}
+        self.cochange_files: list[tuple[int, ...]] = []
+        self.cochange_pool: Counter[str] = Counter()
+        self.cochange_file_pairs: Counter[tuple[str, str]] | None = None
+
+    def add_recent(self, commit: Commit) -> None:
+        if len(self.recent) < self.show_commits:
+            self.recent.append(commit)
+
+    def add_commit(self, commit: Commit) -> None:
+        self.commits += 1
+        self.add_recent(commit)
+        self.prefixes[subject_prefix(commit.subject)] += 1
+        self.keywords.update(subject_keywords(commit.subject))
+
+        period = period_of(commit.date, self.bucket) if self.bucket else None
+        if period is not None:
+            self.period_commits[period] += 1
+
+        areas: dict[str, None] = {}
+        for change in commit.files:
+            area = self.classify(change.path)
+            areas[area] = None
+            self.area_freq.add(area)
+            self.file_freq.add(change.path)
+            churn = change.churn
+            if churn is not None:
+                self.area_churn.add(area, churn)
+                self.file_churn.add(change.path, churn)
+                if period is not None:
+                    self.series_churn[period, area] += churn
+                    self.series_files[period, area][change.path] += churn
+
+        # commits-per-area + sample subjects
+        for area in areas:
+            self.area_commits[area] += 1
+            if len(self.area_samples[area]) < 3:
+                self.area_samples[area].append(commit.subject)
+            if period is not None:
+                self.series_commits[period, area] += 1
+
+        if self.cochange is not None:
+            self._add_cochange(commit, areas)
+
+    def _add_cochange(self, commit: Commit, areas: Iterable[str]) -> None:
+        if len(commit.files) > self.cochange.max_files:
+            self.cochange_skipped += 1
+            return
+        self.cochange_commits += 1
+        names = sorted(areas)
+        self.cochange_area_counts.update(names)
+        self.area_pairs.update(combinations(names, 2))
+        if self.cochange_file_pairs is not None:
+            hit = sorted({f.path for f in commit.files if f.path in self.cochange_pool})
+            self.cochange_pool.update(hit)
+            self.cochange_file_pairs.update(combinations(hit, 2))
+            return
+        ids = self.cochange_file_ids
+        self.cochange_files.append(tuple(sorted({ids.setdefault(f.path, len(ids)) for f in commit.files})))
+        if len(self.cochange_files) > _COCHANGE_HISTORY:
+            self._fold_cochange_files()
+
+    def _file_pairs(self, wanted: Iterable[str]) -> tuple[Counter[str], Counter[tuple[str, str]]]:
+        """Commit counts and pair counts for the `wanted` files over the stored history."""
+
+        names = list(self.cochange_file_ids)
+        wanted = {self.cochange_file_ids[path] for path in wanted if path in self.cochange_file_ids}
+        counts: Counter[str] = Counter()
+        pairs: Counter[tuple[str, str]] = Counter()
+        for ids in self.cochange_files:
+            hit = [names[i] for i in ids if i in wanted]
+            counts.update(hit)
+            pairs.update((a, b) if a < b else (b, a) for a, b in combinations(hit, 2))
+        return counts, pairs
+
+    def _top_cochange_files(self) -> list[str]:
+        names = list(self.cochange_file_ids)
+        seen = Counter(names[i] for ids in self.cochange_files for i in ids)
+        return [path for path, _ in seen.most_common(_COCHANGE_POOL)]
+
+    def _fold_cochange_files(self, extra: Iterable[str] = ()) -> None:
+        """Swap the stored history for pair counts among the _COCHANGE_POOL files in the
+        most kept commits so far (plus `extra`).
+
+        Exact as long as the final top files are all in the pool; a file that only becomes
+        hot later is counted from the fold on.
+        """
+
+        pool = list(dict.fromkeys([*self._top_cochange_files(), *extra]))
+        self.cochange_pool, self.cochange_file_pairs = self._file_pairs(pool)
+        self.cochange_pool.update(dict.fromkeys(pool, 0))
+        self.cochange_file_ids = {}
+        self.cochange_files = []
+
+    def churn_density(self, rev: str, unit: str, sizes: dict[str, int]) -> ChurnDensity:
+        """Rank files and areas by churn per line (or byte) of their size at rev.
+
+        An area's size is the total size of its files at rev. Files deleted since, and
+        anything under the minimum size, are left out.
+        """
+
+        min_size = _DENSITY_MIN_SIZE[unit]
+        area_sizes: Counter[str] = Counter()
+        for path, size in sizes.items():
+            area_sizes[self.classify(path)] += size
+
+        def ranked(counter, size_of) -> list[DensityRow]:
+            rows = [
+                DensityRow(name, churn, size_of.get(name, 0))
+                for name, churn in counter.most_common()
+                if churn and size_of.get(name, 0) >= min_size
+            ]
+            rows.sort(key=lambda r: r.density, reverse=True)
+            return rows
+
+        return ChurnDensity(rev, unit, min_size, ranked(self.file_churn, sizes), ranked(self.area_churn, area_sizes))
+
+    def coupled_areas(self) -> list[CoupledPair]:
+        return rank_pairs(
+            self.area_pairs, self.cochange_area_counts, self.cochange_commits, self.cochange.min_support
+        )
 
-def subject_prefix_counts(subjects: Iterable[str], k: int) -> list[tuple[str, int]]:
-    prefix = Counter()
-    for s in subjects:
-        m = re.match(r"^\[([^\]]+)\]", s)
-        prefix[m.group(1) if m else "(no tag)"] += 1
-    return prefix.most_common(k)
+    def coupled_files(self, top_files: int = _COCHANGE_TOP_FILES) -> list[CoupledPair]:
+        """File pairs among the `top_files` most-touched files (a sparse pair count)."""
+
+        wanted = [path for path, _ in self.file_freq.most_common(top_files)]
+        if self.cochange_file_pairs is None:
+            counts, pairs = self._file_pairs(wanted)
+        else:
+            wanted = {path for path in wanted if path in self.cochange_pool}
+            counts = Counter({path: self.cochange_pool[path] for path in wanted})
+            pairs = Counter(
+                {(a, b): n for (a, b), n in self.cochange_file_pairs.items() if a in wanted and b in wanted}
+            )
+        return rank_pairs(pairs, counts, self.cochange_commits, self.cochange.min_support)
+
+    def add_function_hunks(self, hunks: list[FunctionHunk]) -> None:
+        if self.function_churn is None:
+            self.function_churn = _hot_counter(self.approx)
+        for hunk in hunks:
+            self.function_churn.add(f"{hunk.path}: {hunk.function}", hunk.churn)
+
+    def merge(self, other: ActivityStats) -> None:
+        """Fold in stats for commits that come after this one's (e.g. the next shard).
+
+        Counter.update() appends unseen keys in other's first-seen order, so merging shards
+        in order gives the same tie order as aggregating all commits serially.
+        """
+
+        self.commits += other.commits
+        for commit in other.recent:
+            self.add_recent(commit)
+        for mine, theirs in (
+            (self.prefixes, other.prefixes),
+            (self.keywords, other.keywords),
+            (self.area_commits, other.area_commits),
+            (self.period_commits, other.period_commits),
+            (self.series_commits, other.series_commits),
+            (self.series_churn, other.series_churn),
+        ):
+            mine.update(theirs)
+        for mine, theirs in (
+            (self.area_freq, other.area_freq),
+            (self.area_churn, other.area_churn),
+            (self.file_freq, other.file_freq),
+            (self.file_churn, other.file_churn),
+        ):
+            mine.merge(theirs)
+        for key, files in other.series_files.items():
+            self.series_files[key].update(files)
+        for area, subjects in other.area_samples.items():
+            samples = self.area_samples[area]
+            samples.extend(subjects[: max(0, 3 - len(samples))])
+        if self.cochange is not None:
+            self.cochange_commits += other.cochange_commits
+            self.cochange_skipped += other.cochange_skipped
+            self.cochange_area_counts.update(other.cochange_area_counts)
+            self.area_pairs.update(other.area_pairs)
+            if self.cochange_file_pairs is None and other.cochange_file_pairs is None:
+                ids = self.cochange_file_ids
+                # other's ids are 0..k-1 in insertion order
+                remap = [ids.setdefault(path, len(ids)) for path in other.cochange_file_ids]
+                self.cochange_files.extend(tuple(sorted(remap[i] for i in t)) for t in other.cochange_files)
+                if len(self.cochange_files) > _COCHANGE_HISTORY:
+                    self._fold_cochange_files()
+            else:
+                # Either side has folded: pool the two and add up pair counts over it.
+                if self.cochange_file_pairs is None:
+                    self._fold_cochange_files(other.cochange_pool)
+                if other.cochange_file_pairs is None:
+                    self.cochange_pool.update(dict.fromkeys(other._top_cochange_files(), 0))
+                    counts, pairs = other._file_pairs(self.cochange_pool)
+                else:
+                    counts, pairs = other.cochange_pool, other.cochange_file_pairs
+                self.cochange_pool.update(counts)
+                self.cochange_file_pairs.update(pairs)
+
+    def periods(self) -> list[str]:
+        """Chronological period labels spanning the tallied commits (gaps included)."""
+
+        if not self.bucket or not self.period_commits:
+            return []
+        return period_range(min(self.period_commits), max(self.period_commits), self.bucket)
+
+    def series_areas(self) -> list[str]:
+        """Areas that appear in the time series, by total churn over the whole range."""
+
+        # Seed from commits so areas with only binary changes still get a (zero-churn) column.
+        totals: Counter[str] = Counter({area: 0 for _, area in self.series_commits})
+        for (_, area), churn in self.series_churn.items():
+            totals[area] += churn
+        return [area for area, _ in totals.most_common()]
+
+
+def write_series_csv(stats: ActivityStats, path: Path) -> None:
+    """Long-format time series: one row per (period, area), zero-filled, plus an `(all)` row.
+
+    Columns: period, area, commits, churn, top_files ("path:churn;..." by churn).
+    """
+
+    areas = stats.series_areas()
+    with path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["period", "area", "commits", "churn", "top_files"])
+        for period in stats.periods():
+            writer.writerow(
+                [period, "(all)", stats.period_commits[period], sum(stats.series_churn[period, a] for a in areas), ""]
+            )
+            for area in areas:
+                files = stats.series_files.get((period, area))
+                top_files = ";".join(
+                    f"{path}:{churn}" for path, churn in files.most_common(_SERIES_TOP_FILES)
+                ) if files else ""
+                writer.writerow(
+                    [period, area, stats.series_commits[period, area], stats.series_churn[period, area], top_files]
+                )
 
 
-def markdown_table(rows: list[tuple[str, int]], headers: tuple[str, str]) -> str:
+def markdown_table(rows: list[tuple[str, int | str]], headers: tuple[str, str]) -> str:
     left, right = headers
     out = [f"| {left} | {right} |", "|---|---:|"]
     for key, val in rows:
@@ -364,6 +1907,39 @@ def markdown_table(rows: list[tuple[str, int]], headers: tuple[str, str]) -> str
     return "\n".join(out)
 
 
+def hot_table(
+    counter: ExactCounter | SpaceSaving,
+    top: int,
+    headers: tuple[str, str],
+    owners: dict[str, list[tuple[str, int]]] | None = None,
+) -> str:
+    """markdown_table() of the top keys; sketches add per-row lower bounds and a note, and
+    `owners` adds a blame line-share column."""
+
+    if counter.exact and owners is None:
+        return markdown_table(counter.most_common(top), headers)
+    rows: list[tuple[str, int | str]] = []
+    for key, count in counter.most_common(top):
+        error = counter.error(key)
+        rows.append((key, f"{count} (≥ {count - error})" if error else count))
+    if owners is None:
+        table = markdown_table(rows, headers)
+    else:
+        left, right = headers
+        out = [f"| {left} | {right} | Owners (lines at tip) |", "|---|---:|---|"]
+        for key, val in rows:
+            out.append(f"| {key} | {val} | {owners_cell(owners.get(key))} |")
+        table = "\n".join(out)
+    if counter.exact:
+        return table
+    note = (
+        f"_Approximate: Space-Saving sketch, {counter.capacity} counters over a total of "
+        f"{counter.total}. Counts are upper bounds (a lower bound is shown when they may be "
+        f"inflated); any key not listed has at most {counter.bound()}._"
+    )
+    return table + "\n\n" + note
+
+
 def main(argv: list[str]) -> int:
     ap = argparse.ArgumentParser(description="Generate a git activity report (Markdown).")
     ap.add_argument("--repo", default=".", help="Path to git repo (default: cwd)")
@@ -404,6 +1980,122 @@ def main(argv: list[str]) -> int:
         default=0,
         help="If >0, include a table listing the most recent matching commits (default: 0).",
     )
+    ap.add_argument(
+        "--windows",
+        type=str,
+        default=None,
+        help=(
+            "Comma-separated report windows computed from one history pass, e.g. "
+            "'10,50,200,since:v0.6.0' (N = newest N commits of --rev, since:TAG = commits "
+            "not in TAG). Replaces -n; --out/--csv must contain '{window}' when there are "
+            "several windows."
+        ),
+    )
+    ap.add_argument(
+        "--bucket",
+        choices=_BUCKETS,
+        default=None,
+        help=(
+            "Add a time-series section: commits and churn per area for every ISO week or "
+            "calendar month (author date) in the analyzed range."
+        ),
+    )
+    ap.add_argument(
+        "--csv",
+        type=str,
+        default=None,
+        help="With --bucket, also write the full per-(period, area) series with top files as CSV.",
+    )
+    ap.add_argument(
+        "--summary",
+        type=str,
+        default=None,
+        help=(
+            "Also write headline numbers per window (commits, churn, top area/file) as JSON, "
+            "for wrappers such as snapshot_git_activity.py --manifest."
+        ),
+    )
+    ap.add_argument(
+        "--functions",
+        action="store_true",
+        help=(
+            "Add a hot-functions table: stream `git log -p -U0` for the same commits and "
+            "attribute each hunk's churn to its enclosing C/C++/CUDA or Python function."
+        ),
+    )
+    ap.add_argument(
+        "--density",
+        choices=tuple(_DENSITY_MIN_SIZE),
+        nargs="?",
+        const="lines",
+        default=None,
+        help=(
+            "Add a churn-density section: churn divided by each file's/area's current size at "
+            "the tip of --rev, in lines (default; reads blobs via one cat-file stream) or bytes "
+            "(one ls-tree call)."
+        ),
+    )
+    ap.add_argument(
+        "--owners",
+        action="store_true",
+        help=(
+            "Add an ownership column to the hot-files tables: `git blame` line shares at the tip "
+            "of --rev, run on a bounded pool and cached by blob in the commit store."
+        ),
+    )
+    ap.add_argument(
+        "--cochange",
+        action="store_true",
+        help="Add a co-change section: area and file pairs that change together, ranked by lift.",
+    )
+    ap.add_argument(
+        "--cochange-max-files",
+        type=int,
+        default=CochangeOptions.max_files,
+        help=f"Skip commits touching more files than this for co-change (default: {CochangeOptions.max_files}).",
+    )
+    ap.add_argument(
+        "--cochange-min-support",
+        type=int,
+        default=CochangeOptions.min_support,
+        help=(
+            "Only report pairs that changed together in at least this many commits "
+            f"(default: {CochangeOptions.min_support})."
+        ),
+    )
+    ap.add_argument(
+        "--approx",
+        type=int,
+        nargs="?",
+        const=_APPROX_COUNTERS,
+        default=None,
+        metavar="COUNTERS",
+        help=(
+            "Bounded-memory mode for huge histories: hot areas/files use Space-Saving sketches "
+            f"with COUNTERS entries each (default: {_APPROX_COUNTERS}); the report prints "
+            "error bounds."
+        ),
+    )
+    ap.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help=(
+            "Split the range into commit shards and diff them across N worker processes "
+            "(default: 1, serial; 0 = one per CPU). Output is identical to the serial run."
+        ),
+    )
+    ap.add_argument(
+        "--cache-dir",
+        default=str(_DEFAULT_CACHE_DIR),
+        help="Directory for the persistent per-repo commit store (default: <notes>/.cache)",
+    )
+    ap.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Read every commit from git and neither read nor write the commit store.",
+    )
     ap.add_argument(
         "--github-base",
         type=str,
@@ -415,6 +2107,22 @@ def main(argv: list[str]) -> int:
     )
 
     args = ap.parse_args(argv)
+    if args.approx is not None and args.approx <= 0:
+        ap.error("--approx needs a positive number of counters")
+    if args.csv and not args.bucket:
+        ap.error("--csv requires --bucket")
+    windows: list[Window] | None = None
+    if args.windows:
+        try:
+            windows = parse_windows(args.windows)
+        except ValueError as e:
+            ap.error(str(e))
+        if len(windows) > 1 and "{window}" not in args.out:
+            ap.error("--windows with several windows needs --out containing '{window}'")
+        if len(windows) > 1 and args.csv and "{window}" not in args.csv:
+            ap.error("--windows with several windows needs --csv containing '{window}'")
+        if args.no_cache and _resolve_jobs(args.jobs) > 1:
+            ap.error("--windows reads one serial stream without the commit store; drop --no-cache or -j")
 
     repo = Path(args.repo).expanduser().resolve()
     if not (repo / ".git").exists():
@@ -445,62 +2153,168 @@ def main(argv: list[str]) -> int:
     else:
         github_base = detect_github_base(repo)
 
-    subjects_all = iter_subjects(
-        repo,
-        args.n,
-        args.rev,
+    cochange = None
+    if args.cochange:
+        cochange = CochangeOptions(args.cochange_max_files, args.cochange_min_support)
+    stats = ActivityStats(
+        rules, show_commits=args.show_commits, bucket=args.bucket, approx=args.approx, cochange=cochange
+    )
+    depth = args.n
+    if windows is not None:
+        depth = resolve_windows(repo, windows, args.rev, args.include_merges, pathspec)
+    # --show-commits may ask for more commits than -n analyzes; fetch enough for both. Commits
+    # are folded into the stats as they stream in and not kept.
+    log_args = dict(
+        repo=repo,
+        n=max(depth, args.show_commits),
+        rev=args.rev,
         include_merges=args.include_merges,
         pathspec=pathspec,
     )
-    prefixes = subject_prefix_counts(subjects_all, args.top)
-    keywords = top_keywords(subjects_all, 15)
-
-    # file touch + churn stats (prefer excluding merges for file metrics)
-    numstat = list(
-        parse_numstat(
-            repo,
-            args.n,
-            args.rev,
-            include_merges=args.include_merges,
+    store = None
+    if not args.no_cache and pathspec_matcher(pathspec) is not None:
+        store = CommitStore.for_repo(Path(args.cache_dir).expanduser().resolve(), repo)
+    try:
+        if windows is not None:
+            if store is not None:
+                commits: Iterator[Commit] = iter_commits_stored(store=store, jobs=args.jobs, **log_args)
+            else:
+                commits = iter_commits(**log_args)
+            reports = collect_windows(
+                commits, windows, rules, args.show_commits, args.bucket, args.approx, cochange
+            )
+            commits = iter(())
+        elif store is None and _resolve_jobs(args.jobs) > 1:
+            shas = rev_list(**log_args)
+            stats = collect_stats_parallel(
+                repo,
+                shas,
+                args.n,
+                pathspec,
+                rules,
+                args.show_commits,
+                args.jobs,
+                args.bucket,
+                args.approx,
+                cochange,
+            )
+            commits = iter(())
+        elif store is not None:
+            commits = iter_commits_stored(store=store, jobs=args.jobs, **log_args)
+        else:
+            commits = iter_commits(**log_args)
+        for i, commit in enumerate(commits):
+            if i < args.n:
+                stats.add_commit(commit)
+            else:
+                stats.add_recent(commit)
+    finally:
+        if store is not None:
+            store.close()
+
+    if windows is None:
+        windows = [Window("", f"last {args.n} commits", n=args.n)]
+        reports = {"": stats}
+
+    if args.density:
+        tip = tip_of(args.rev)
+        sizes = tree_sizes(repo, tip, args.density, pathspec_matcher(pathspec))
+        for w in windows:
+            reports[w.label].density = reports[w.label].churn_density(tip, args.density, sizes)
+
+    if args.owners:
+        tip = tip_of(args.rev)
+        hot = dict.fromkeys(
+            path
+            for w in windows
+            for counter in (reports[w.label].file_freq, reports[w.label].file_churn)
+            for path, _ in counter.most_common(args.top)
+        )
+        blame_store = None
+        if not args.no_cache:
+            blame_store = CommitStore.for_repo(Path(args.cache_dir).expanduser().resolve(), repo)
+        try:
+            workers = _resolve_jobs(args.jobs) if args.jobs != 1 else _BLAME_WORKERS
+            owners = file_owners(repo, tip, list(hot), blame_store, workers)
+        finally:
+            if blame_store is not None:
+                blame_store.close()
+        for w in windows:
+            reports[w.label].owners = owners
+
+    if args.functions:
+        # Windows that ran past the end of the range share one stats object; feed it once.
+        targets = list({id(reports[w.label]): (w, reports[w.label]) for w in windows}.values())
+        for _, target in targets:
+            target.function_churn = _hot_counter(args.approx)
+        for i, (sha, hunks) in enumerate(iter_function_hunks(**dict(log_args, n=depth))):
+            for w, target in targets:
+                if (sha in w.members) if w.members is not None else i < w.n:
+                    target.add_function_hunks(hunks)
+
+    summary: list[dict] = []
+    for window in windows:
+        stats = reports[window.label]
+        summary.append(summary_record(stats, window))
+        text = render_report(
+            stats,
+            repo=repo,
+            title=f"Git activity report: {window.title} ({branch}@{head})",
             pathspec=pathspec,
+            github_base=github_base,
+            top=args.top,
+            top_areas=args.top_areas,
         )
-    )
 
-    area_freq = Counter()
-    area_churn = Counter()
-    file_freq = Counter()
-    file_churn = Counter()
-
-    for added, deleted, path in numstat:
-        area = bucket_path(path, rules)
-        area_freq[area] += 1
-        file_freq[path] += 1
-        if added is not None and deleted is not None:
-            churn = added + deleted
-            area_churn[area] += churn
-            file_churn[path] += churn
-
-    # commits-per-area + sample subjects
-    commits = parse_name_only(
-        repo,
-        args.n,
-        args.rev,
-        include_merges=args.include_merges,
-        pathspec=pathspec,
-    )
-    area_commits = Counter()
-    area_samples: dict[str, list[str]] = defaultdict(list)
-    for subj, files in commits:
-        areas = {bucket_path(f, rules) for f in files}
-        for a in areas:
-            area_commits[a] += 1
-            if len(area_samples[a]) < 3:
-                area_samples[a].append(subj)
+        if args.csv:
+            write_series_csv(stats, Path(args.csv.replace("{window}", window.label)).expanduser())
+
+        if args.out == "-":
+            sys.stdout.write(text)
+            if not text.endswith("\n"):
+                sys.stdout.write("\n")
+        else:
+            out_path = Path(args.out.replace("{window}", window.label)).expanduser()
+            out_path.write_text(text, encoding="utf-8")
+
+    if args.summary:
+        doc = {"repo": str(repo), "rev": args.rev, "branch": branch, "head": head, "windows": summary}
+        Path(args.summary).expanduser().write_text(json.dumps(doc, indent=2) + "\n", encoding="utf-8")
+
+    return 0
+
+
+def summary_record(stats: ActivityStats, window: Window) -> dict:
+    """Headline numbers of one window for --summary (counts are upper bounds with --approx)."""
+
+    churn = stats.area_churn.total if not stats.area_churn.exact else sum(stats.area_churn.values())
+    top_area = stats.area_commits.most_common(1)
+    top_file = stats.file_churn.most_common(1)
+    return {
+        "window": window.label,
+        "title": window.title,
+        "commits": stats.commits,
+        "churn": churn,
+        "top_area": top_area[0][0] if top_area else None,
+        "top_area_commits": top_area[0][1] if top_area else 0,
+        "top_file": top_file[0][0] if top_file else None,
+        "top_file_churn": top_file[0][1] if top_file else 0,
+    }
 
-    top_work_items = area_commits.most_common(args.top_areas)
+
+def render_report(
+    stats: ActivityStats,
+    *,
+    repo: Path,
+    title: str,
+    pathspec: list[str],
+    github_base: str | None,
+    top: int,
+    top_areas: int,
+) -> str:
+    top_work_items = stats.area_commits.most_common(top_areas)
 
     now = datetime.now().strftime("%Y-%m-%d %H:%M")
-    title = f"Git activity report: last {args.n} commits ({branch}@{head})"
 
     lines: list[str] = []
     lines.append(f"# {title}")
@@ -511,36 +2325,29 @@ def main(argv: list[str]) -> int:
         lines.append(f"Path filter: `{', '.join(pathspec)}`")
     lines.append("")
 
-    if args.show_commits > 0:
-        recent = iter_short_commits(
-            repo,
-            args.show_commits,
-            args.rev,
-            include_merges=args.include_merges,
-            pathspec=pathspec,
-        )
+    if stats.show_commits > 0:
         lines.append("## Recent commits")
         lines.append("")
         lines.append("| Commit | Date (iso) | Subject |")
         lines.append("|---|---|---|")
-        for full_sha, short_sha, dt, subj in recent:
+        for commit in stats.recent:
             if github_base:
-                sha_cell = f"[{short_sha}]({github_base}/commit/{full_sha})"
+                sha_cell = f"[{commit.short}]({github_base}/commit/{commit.sha})"
             else:
-                sha_cell = short_sha
-            lines.append(f"| {sha_cell} | {dt} | {subj} |")
+                sha_cell = commit.short
+            lines.append(f"| {sha_cell} | {commit.date} | {commit.subject} |")
         lines.append("")
 
     lines.append("## Trends")
     lines.append("")
     lines.append("### Commit subject tags/prefixes")
     lines.append("")
-    lines.append(markdown_table([(k, v) for k, v in prefixes], ("Prefix", "Count")))
+    lines.append(markdown_table(stats.prefixes.most_common(top), ("Prefix", "Count")))
     lines.append("")
 
     lines.append("### Top subject keywords")
     lines.append("")
-    lines.append(markdown_table([(k, v) for k, v in keywords], ("Keyword", "Count")))
+    lines.append(markdown_table(stats.keywords.most_common(15), ("Keyword", "Count")))
     lines.append("")
 
     lines.append("## Top work items (areas)")
@@ -550,32 +2357,113 @@ def main(argv: list[str]) -> int:
     lines.append("| Area | Commits | Sample subjects |")
     lines.append("|---|---:|---|")
     for area, count in top_work_items:
-        samples = area_samples.get(area, [])
+        samples = stats.area_samples.get(area, [])
         sample_text = "<br>".join(samples)
         lines.append(f"| {area} | {count} | {sample_text} |")
     lines.append("")
 
     lines.append("## Hot areas (by file touches)")
     lines.append("")
-    lines.append(markdown_table(area_freq.most_common(args.top), ("Area", "Touched files")))
+    lines.append(hot_table(stats.area_freq, top, ("Area", "Touched files")))
     lines.append("")
 
     lines.append("## Hot areas (by churn)")
     lines.append("")
-    lines.append(markdown_table(area_churn.most_common(args.top), ("Area", "Added+Deleted")))
+    lines.append(hot_table(stats.area_churn, top, ("Area", "Added+Deleted")))
     lines.append("")
 
     lines.append("## Hot files (by touch frequency)")
     lines.append("")
-    lines.append(markdown_table(file_freq.most_common(args.top), ("File", "Touches")))
+    lines.append(hot_table(stats.file_freq, top, ("File", "Touches"), stats.owners))
     lines.append("")
 
     lines.append("## Hot files (by churn)")
     lines.append("")
-    lines.append(markdown_table(file_churn.most_common(args.top), ("File", "Added+Deleted")))
+    lines.append(hot_table(stats.file_churn, top, ("File", "Added+Deleted"), stats.owners))
     lines.append("")
 
-    rules_json = json.dumps([{"name": r.name, "pattern": r.pattern.pattern} for r in rules], indent=2)
+    if stats.function_churn is not None:
+        lines.append("## Hot functions (by churn)")
+        lines.append("")
+        lines.append(
+            "Hunks of C/C++/CUDA and Python files, attributed to the enclosing function git "
+            "names in each `@@` header (`git log -p -U0`)."
+        )
+        lines.append("")
+        lines.append(hot_table(stats.function_churn, top, ("Function", "Added+Deleted")))
+        lines.append("")
+
+    if stats.density is not None:
+        density = stats.density
+        scale, unit = _DENSITY_PER[density.unit]
+        lines.append("## Churn density")
+        lines.append("")
+        lines.append(
+            f"Added+deleted lines per {unit} of current size at `{density.rev}`, which surfaces "
+            f"small files that keep being rewritten (sizes under {density.min_size} "
+            f"{density.unit} and deleted files are skipped)."
+        )
+        lines.append("")
+        for heading, rows, label in (
+            ("### Files", density.files, "File"),
+            ("### Areas", density.areas, "Area"),
+        ):
+            lines.append(heading)
+            lines.append("")
+            lines.append(f"| {label} | Added+Deleted | {density.unit.capitalize()} | Churn per {unit} |")
+            lines.append("|---|---:|---:|---:|")
+            for row in rows[:top]:
+                lines.append(f"| {row.name} | {row.churn} | {row.size} | {row.density * scale:.2f} |")
+            lines.append("")
+
+    if stats.cochange is not None:
+        opts = stats.cochange
+        lines.append("## Co-change coupling")
+        lines.append("")
+        lines.append(
+            f"Pairs that changed in the same commit, over {stats.cochange_commits} commits "
+            f"({stats.cochange_skipped} skipped for touching more than {opts.max_files} files). "
+            f"Only pairs seen together at least {opts.min_support} times; ranked by lift "
+            "(how many times more often they change together than if they were independent)."
+        )
+        lines.append("")
+        for heading, pairs in (
+            ("### Areas", stats.coupled_areas()),
+            (f"### Files (among the {_COCHANGE_TOP_FILES} most touched)", stats.coupled_files()),
+        ):
+            lines.append(heading)
+            lines.append("")
+            lines.append("| Pair | Together | P(B given A) | P(A given B) | Lift |")
+            lines.append("|---|---:|---:|---:|---:|")
+            for pair in pairs[:top]:
+                lines.append(
+                    f"| {pair.a} ↔ {pair.b} | {pair.support} | {pair.confidence_ab:.2f} | "
+                    f"{pair.confidence_ba:.2f} | {pair.lift:.2f} |"
+                )
+            lines.append("")
+
+    if stats.bucket:
+        areas = stats.series_areas()[:top_areas]
+        lines.append(f"## Time series (per {stats.bucket})")
+        lines.append("")
+        lines.append(
+            f"Commits / added+deleted per {stats.bucket} (author date) for the top {len(areas)} "
+            "areas by churn. Use `--csv` for every area with its top files."
+        )
+        lines.append("")
+        lines.append("| Period | Commits | " + " | ".join(areas) + " |")
+        lines.append("|---|---:|" + "---:|" * len(areas))
+        for period in stats.periods():
+            cells = [
+                f"{stats.series_commits[period, area]} / {stats.series_churn[period, area]}"
+                for area in areas
+            ]
+            lines.append(f"| {period} | {stats.period_commits[period]} | " + " | ".join(cells) + " |")
+        lines.append("")
+
+    rules_json = json.dumps(
+        [{"name": r.name, "pattern": r.pattern.pattern} for r in stats.rules], indent=2
+    )
     lines.append("## Bucketing rules")
     lines.append("")
     lines.append("You can override these with `--rules rules.json`. Format is JSON list: `[{name, pattern}, ...]`.")
@@ -585,17 +2473,7 @@ def main(argv: list[str]) -> int:
     lines.append("```")
     lines.append("")
 
-    text = "\n".join(lines)
-
-    if args.out == "-":
-        sys.stdout.write(text)
-        if not text.endswith("\n"):
-            sys.stdout.write("\n")
-    else:
-        out_path = Path(args.out).expanduser()
-        out_path.write_text(text, encoding="utf-8")
-
-    return 0
+    return "\n".join(lines)
 
 
 if __name__ == "__main__":
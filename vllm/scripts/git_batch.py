@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""Cheap git object lookups through long-lived `git cat-file` processes.
+
+Every `git` fork-exec costs a few milliseconds, which adds up over thousands of per-commit
+or per-blob lookups. GitBatch keeps one `git cat-file --batch` (contents) and one
+`git cat-file --batch-check` (type/size) process per repo and pipelines requests through
+them: names are written from a thread while replies are read in order, so neither pipe
+can fill up and block.
+
+Shared by the scripts in this folder (stdlib only):
+
+  from git_batch import GitBatch
+
+  git = GitBatch.for_repo(Path("~/vllm").expanduser())
+  git.commit("HEAD").subject
+  git.blob("HEAD:csrc/topk.cu")
+  git.sizes("HEAD", ["csrc/topk.cu", "vllm/_custom_ops.py"])
+"""
+
+from __future__ import annotations
+
+import atexit
+import subprocess
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+
+@dataclass(frozen=True)
+class ObjectInfo:
+    sha: str
+    type: str
+    size: int
+
+
+@dataclass(frozen=True)
+class CommitInfo:
+    sha: str
+    tree: str
+    parents: tuple[str, ...]
+    # "Name <email>" and the raw epoch seconds / timezone of the author and committer lines.
+    author: str
+    author_time: int
+    author_tz: str
+    committer: str
+    commit_time: int
+    commit_tz: str
+    message: str
+
+    @property
+    def subject(self) -> str:
+        return self.message.split("\n", 1)[0]
+
+
+@dataclass(frozen=True)
+class TreeEntry:
+    mode: str
+    type: str
+    sha: str
+    # None for submodules (commits) and trees.
+    size: int | None
+    path: str
+
+
+def _split_ident(value: str) -> tuple[str, int, str]:
+    # "Name <email> 1700000000 +0000"
+    ident, _, rest = value.rpartition("> ")
+    ts, _, tz = rest.partition(" ")
+    return ident + ">", int(ts), tz
+
+
+def parse_commit(sha: str, data: bytes) -> CommitInfo:
+    """Parse a raw commit object (as printed by `git cat-file commit`)."""
+
+    text = data.decode("utf-8", "replace")
+    header, _, message = text.partition("\n\n")
+    tree = ""
+    parents: list[str] = []
+    author = committer = ("", 0, "")
+    for line in header.split("\n"):
+        key, _, value = line.partition(" ")
+        if key == "tree":
+            tree = value
+        elif key == "parent":
+            parents.append(value)
+        elif key == "author":
+            author = _split_ident(value)
+        elif key == "committer":
+            committer = _split_ident(value)
+    return CommitInfo(sha, tree, tuple(parents), *author, *committer, message)
+
+
+def _parse_header(header: bytes) -> ObjectInfo | None:
+    """`<sha> <type> <size>`, or None for `<name> missing` / `<name> ambiguous`.
+
+    The name is echoed verbatim and may contain spaces (`HEAD:a b`), so the status word is
+    checked before the line is split into fields.
+    """
+
+    if header.endswith((b" missing\n", b" ambiguous\n")):
+        return None
+    sha, kind, size = header.split()
+    return ObjectInfo(sha.decode(), kind.decode(), int(size))
+
+
+class _CatFile:
+    """One `git cat-file --batch` or `--batch-check` process."""
+
+    def __init__(self, repo: Path, mode: str):
+        self.mode = mode
+        self._proc = subprocess.Popen(
+            ["git", "-C", str(repo), "cat-file", mode],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        # One request stream at a time: replies are matched to names by position.
+        self._lock = threading.Lock()
+        # Thread currently iterating a request, to fail fast on nested requests.
+        self._owner: int | None = None
+
+    def request(self, names: list[str]) -> Iterator[tuple[str, ObjectInfo | None, bytes | None]]:
+        """Yield (name, info or None if missing, contents for --batch) in request order.
+
+        If the caller stops early, the remaining replies are drained so the next request
+        starts on a clean stream. The process is held until the iteration ends, so requests
+        must not nest: a second request on the same process from the thread that is still
+        iterating raises RuntimeError (it would otherwise deadlock). Other threads wait.
+        """
+
+        if not names:
+            return
+        if self._owner == threading.get_ident():
+            raise RuntimeError(
+                f"nested git cat-file {self.mode} request: finish or close the previous iteration first"
+            )
+        proc = self._proc
+        assert proc.stdin is not None and proc.stdout is not None
+        stdin: IO[bytes] = proc.stdin
+        stdout: IO[bytes] = proc.stdout
+        with_data = self.mode == "--batch"
+
+        def feed() -> None:
+            for name in names:
+                stdin.write(name.encode() + b"\n")
+            stdin.flush()
+
+        with self._lock:
+            self._owner = threading.get_ident()
+            writer = threading.Thread(target=feed, daemon=True)
+            writer.start()
+            pending = len(names)
+            try:
+                for name in names:
+                    header = stdout.readline()
+                    if not header:
+                        raise RuntimeError(f"git cat-file {self.mode} exited early")
+                    pending -= 1
+                    info = _parse_header(header)
+                    if info is None:
+                        yield name, None, None
+                        continue
+                    data = None
+                    if with_data:
+                        data = stdout.read(info.size)
+                        stdout.read(1)  # trailing newline
+                    yield name, info, data
+            finally:
+                for _ in range(pending):
+                    info = _parse_header(stdout.readline())
+                    if with_data and info is not None:
+                        stdout.read(info.size + 1)
+                writer.join()
+                self._owner = None
+
+    def close(self) -> None:
+        if self._proc.stdin:
+            self._proc.stdin.close()
+        self._proc.wait()
+        if self._proc.stdout:
+            self._proc.stdout.close()
+
+
+class GitBatch:
+    """Per-repo object access through long-lived `git cat-file` processes.
+
+    Object names are anything `git cat-file` accepts: shas, refs, `rev:path`. The two
+    processes start on first use; close() (or interpreter exit) stops them.
+    """
+
+    _shared: dict[Path, GitBatch] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, repo: Path):
+        self.repo = repo
+        self._batch: _CatFile | None = None
+        self._check: _CatFile | None = None
+        # Shared instances are used from several threads; start each process only once.
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_repo(cls, repo: Path) -> GitBatch:
+        """A process-wide instance per repo, so unrelated callers share the processes."""
+
+        key = repo.resolve()
+        with cls._shared_lock:
+            batch = cls._shared.get(key)
+            if batch is None:
+                batch = cls._shared[key] = cls(key)
+        return batch
+
+    def _contents(self) -> _CatFile:
+        with self._lock:
+            if self._batch is None:
+                self._batch = _CatFile(self.repo, "--batch")
+            return self._batch
+
+    def _checker(self) -> _CatFile:
+        with self._lock:
+            if self._check is None:
+                self._check = _CatFile(self.repo, "--batch-check")
+            return self._check
+
+    def info(self, names: Iterable[str]) -> list[ObjectInfo | None]:
+        """Type and size of each object (None if missing), without reading contents."""
+
+        return [info for _, info, _ in self._checker().request(list(names))]
+
+    def iter_blobs(self, names: Iterable[str]) -> Iterator[bytes]:
+        """Contents of each object in order; raises RuntimeError for a missing object."""
+
+        for name, info, data in self._contents().request(list(names)):
+            if info is None or data is None:
+                raise RuntimeError(f"git cat-file: cannot read object {name}")
+            yield data
+
+    def blob(self, name: str) -> bytes:
+        return next(self.iter_blobs([name]))
+
+    def commits(self, names: Iterable[str]) -> Iterator[CommitInfo]:
+        for name, info, data in self._contents().request(list(names)):
+            if info is None or data is None or info.type != "commit":
+                raise RuntimeError(f"git cat-file: not a commit: {name}")
+            yield parse_commit(info.sha, data)
+
+    def commit(self, name: str) -> CommitInfo:
+        return next(self.commits([name]))
+
+    def sizes(self, rev: str, paths: Iterable[str]) -> dict[str, int]:
+        """Byte size of each path's blob at rev (paths missing at rev are left out)."""
+
+        paths = list(paths)
+        out: dict[str, int] = {}
+        for path, info in zip(paths, self.info(f"{rev}:{path}" for path in paths)):
+            if info is not None and info.type == "blob":
+                out[path] = info.size
+        return out
+
+    def tree_entries(self, rev: str, paths: Iterable[str] = ()) -> list[TreeEntry]:
+        """Every entry under rev (optionally limited to paths), with blob sizes.
+
+        One `git ls-tree -r -l -z` call: the whole listing in a single fork.
+        """
+
+        cmd = ["git", "-C", str(self.repo), "ls-tree", "-r", "-l", "-z", rev, "--", *paths]
+        try:
+            out = subprocess.check_output(cmd, stderr=subprocess.STDOUT)
+        except subprocess.CalledProcessError as e:
+            message = e.output.decode("utf-8", "replace").strip()
+            raise RuntimeError(message or f"git command failed: {' '.join(cmd)}") from e
+        entries: list[TreeEntry] = []
+        for record in out.decode("utf-8", "replace").split("\0"):
+            if not record:
+                continue
+            meta, path = record.split("\t", 1)
+            mode, kind, sha, size = meta.split()
+            entries.append(TreeEntry(mode, kind, sha, None if size == "-" else int(size), path))
+        return entries
+
+    def close(self) -> None:
+        with self._lock:
+            for proc in (self._batch, self._check):
+                if proc is not None:
+                    proc.close()
+            self._batch = self._check = None
+
+
+@atexit.register
+def _close_shared() -> None:
+    for batch in GitBatch._shared.values():
+        batch.close()
+    GitBatch._shared.clear()
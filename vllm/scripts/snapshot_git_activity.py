@@ -5,22 +5,46 @@ This is a thin wrapper around `scripts/git_activity_report.py` that:
 - picks a default output directory (`./reports`)
 - generates a stable timestamped filename
 - optionally also writes a `latest-<repo>.md` copy for quick access
+- skips generation when nothing changed since an existing snapshot (see `--force`)
+- with `--manifest`, snapshots many repos concurrently and adds a cross-repo summary
+
+A single snapshot runs the report in-process. With `--manifest`, each report instead runs
+as its own `git_activity_report.py` asyncio subprocess under the `--concurrency` limit, so
+the repos' git work and parsing really run in parallel, and each report keeps its own
+argparse exits and stderr.
 
 Example:
   python3 scripts/snapshot_git_activity.py --repo ~/vllm -n 50
+  python3 scripts/snapshot_git_activity.py --manifest repos.toml --latest
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
+import hashlib
+import json
 import os
 import re
 import shutil
 import subprocess
 import sys
+import tempfile
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 
+import git_activity_report
+import git_batch
+
+# Repos snapshotted at once in --manifest mode (each report runs its own git processes).
+_DEFAULT_CONCURRENCY = 4
+
+_REPORT_SCRIPT = Path(__file__).resolve().parent / "git_activity_report.py"
+
+# Bump when the fingerprint's inputs change meaning, so old sidecars stop matching.
+_FINGERPRINT_VERSION = 1
+
 
 def _sanitize_filename(s: str) -> str:
     # Keep it simple and filesystem-friendly.
@@ -36,24 +60,407 @@ def _detect_repo_name(repo: Path) -> str:
     return repo.name
 
 
-def _git_toplevel(repo: Path) -> Path:
-    try:
-        out = subprocess.check_output(
-            ["git", "-C", str(repo), "rev-parse", "--show-toplevel"],
-            text=True,
-            stderr=subprocess.STDOUT,
-            errors="replace",
-        ).strip()
-        return Path(out)
-    except subprocess.CalledProcessError as e:
-        raise SystemExit((e.output or "").strip() or f"Not a git repo: {repo}")
+@dataclass
+class RepoJob:
+    """One repository to snapshot: a manifest entry with the command-line defaults filled in."""
+
+    name: str
+    repo: Path
+    rev: str = "HEAD"
+    n: int = 50
+    windows: str | None = None
+    paths: list[str] = field(default_factory=list)
+    paths_file: Path | None = None
+    rules: Path | None = None
+
+
+def load_manifest(path: Path, defaults: argparse.Namespace) -> list[RepoJob]:
+    """Read a JSON or TOML manifest: a list of repos (or {"repos": [...]}, or [[repos]] in TOML).
+
+    Each entry needs `repo`; `name`, `rev`, `n`, `windows`, `paths` (string or list),
+    `paths_file` and `rules` are optional and default to the command-line values.
+    Relative paths are resolved against the manifest's folder.
+    """
+
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".toml":
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            raise SystemExit("TOML manifests need Python 3.11+ (tomllib); use a JSON manifest instead")
+        data = tomllib.loads(text)
+    else:
+        data = json.loads(text)
+    entries = data.get("repos", []) if isinstance(data, dict) else data
+    if not isinstance(entries, list) or not entries:
+        raise SystemExit(f"Manifest lists no repos: {path}")
+
+    base = path.parent
+
+    def resolve(value: str | None) -> Path | None:
+        return None if value is None else (base / Path(value).expanduser()).resolve()
+
+    jobs: list[RepoJob] = []
+    for entry in entries:
+        if not isinstance(entry, dict) or "repo" not in entry:
+            raise SystemExit(f"Manifest entry needs a 'repo': {entry!r}")
+        repo = resolve(entry["repo"])
+        assert repo is not None
+        paths = entry.get("paths", defaults.path)
+        jobs.append(
+            RepoJob(
+                name=entry.get("name") or repo.name,
+                repo=repo,
+                rev=entry.get("rev", defaults.rev),
+                n=int(entry.get("n", defaults.n)),
+                windows=entry.get("windows", defaults.windows),
+                paths=[paths] if isinstance(paths, str) else list(paths),
+                paths_file=resolve(entry.get("paths_file")) or _expand(defaults.paths_file),
+                rules=resolve(entry.get("rules")) or _expand(defaults.rules),
+            )
+        )
+    for job in jobs:
+        if job.windows:
+            try:
+                git_activity_report.parse_windows(job.windows)
+            except ValueError as e:
+                raise SystemExit(f"Manifest repo {job.name}: {e}")
+    names = [_sanitize_filename(job.name) for job in jobs]
+    dupes = sorted({name for name in names if names.count(name) > 1})
+    if dupes:
+        raise SystemExit(f"Manifest repos need distinct names (set 'name'): {', '.join(dupes)}")
+    return jobs
+
+
+def _expand(value: str | None) -> Path | None:
+    return None if value is None else Path(value).expanduser()
+
+
+def report_args(job: RepoJob, args: argparse.Namespace, out_file: Path, summary: Path) -> list[str]:
+    """The git_activity_report.py arguments for one repo."""
+
+    cmd = [
+        "--repo",
+        str(job.repo),
+        "-n",
+        str(job.n),
+        "--rev",
+        str(job.rev),
+        "--out",
+        str(out_file),
+        "--top",
+        str(args.top),
+        "--top-areas",
+        str(args.top_areas),
+        "--summary",
+        str(summary),
+    ]
+    if job.windows:
+        cmd += ["--windows", job.windows]
+    if job.rules:
+        cmd += ["--rules", str(job.rules)]
+    if job.paths_file:
+        cmd += ["--paths-file", str(job.paths_file)]
+    for p in job.paths:
+        if p and str(p).strip():
+            cmd += ["--path", str(p).strip()]
+    if args.show_commits:
+        cmd += ["--show-commits", str(args.show_commits)]
+    if args.jobs != 1:
+        cmd += ["--jobs", str(args.jobs)]
+    if args.cache_dir:
+        cmd += ["--cache-dir", str(Path(args.cache_dir).expanduser())]
+    if args.no_cache:
+        cmd += ["--no-cache"]
+    return cmd
+
+
+def snapshot_file(out_dir: Path, repo_slug: str, job: RepoJob, ts: str) -> Path:
+    window = "{window}" if job.windows else f"n{job.n}"
+    return out_dir / f"{repo_slug}-activity-{window}-{_sanitize_filename(job.rev)}-{ts}.md"
+
+
+def resolve_command(job: RepoJob) -> list[str]:
+    """One `git rev-parse` printing the repo root, then the shas and branch a report depends on.
+
+    Ranges resolve to several lines (`B`, `^A`), which is fine: the lines are only hashed.
+    """
+
+    refs = [job.rev]
+    if job.windows:
+        refs += [w.tag for w in git_activity_report.parse_windows(job.windows) if w.tag]
+    return [
+        "git", "-C", str(job.repo), "rev-parse", "--show-toplevel",
+        "HEAD", *refs, "--symbolic-full-name", "HEAD",
+    ]  # fmt: skip
+
+
+def remote_command(job: RepoJob) -> list[str]:
+    """The origin URL the report derives its GitHub commit links from (exit 1 if unset)."""
+
+    return ["git", "-C", str(job.repo), "config", "--get", "remote.origin.url"]
+
+
+def _file_hash(path: Path | None) -> str | None:
+    return None if path is None else hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def fingerprint(job: RepoJob, args: argparse.Namespace, resolved: list[str]) -> str:
+    """Hash of everything the report's content depends on, apart from the clock.
+
+    That is: the resolved HEAD/rev/tag shas and branch (from resolve_command()) plus the
+    origin URL (from remote_command()), the window, the path filter, the rules, the table
+    options, and the source of the report scripts. The commit store is left out: reports
+    are identical with or without it.
+    """
+
+    inputs = {
+        "version": _FINGERPRINT_VERSION,
+        "repo": str(job.repo),
+        "rev": job.rev,
+        "resolved": resolved,
+        "window": job.windows or job.n,
+        "paths": [str(p).strip() for p in job.paths if p and str(p).strip()],
+        "paths_file": _file_hash(job.paths_file),
+        "rules": _file_hash(job.rules),
+        "options": [args.top, args.top_areas, args.show_commits],
+        "scripts": [_file_hash(Path(m.__file__)) for m in (git_activity_report, git_batch)],
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+@dataclass
+class Snapshot:
+    # Window label ("" for a single report) -> report file.
+    reports: dict[str, Path]
+    # The report's --summary document.
+    summary: dict
+    # True when an identical earlier snapshot was reused instead of generating one.
+    reused: bool = False
+
+
+def find_snapshot(out_dir: Path, repo_slug: str, fp: str) -> Snapshot | None:
+    """The newest snapshot in out_dir with this fingerprint whose reports are still intact."""
+
+    for sidecar in sorted(out_dir.glob(f"{repo_slug}-activity-*.fingerprint.json"), reverse=True):
+        try:
+            data = json.loads(sidecar.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if data.get("fingerprint") != fp:
+            continue
+        reports = {label: out_dir / name for label, name in data["reports"].items()}
+        hashes = data.get("hashes", {})
+        if all(path.exists() and _file_hash(path) == hashes.get(label) for label, path in reports.items()):
+            return Snapshot(reports, data["summary"], reused=True)
+    return None
+
+
+def update_latest(out_dir: Path, repo_slug: str, reports: dict[str, Path]) -> None:
+    """Copy each report to latest-<repo>.md (latest-<repo>-<window>.md for --windows)."""
+
+    for label, path in reports.items():
+        latest = out_dir / (f"latest-{repo_slug}-{label}.md" if label else f"latest-{repo_slug}.md")
+        shutil.copyfile(path, latest)
+
+
+def snapshot_repo(job: RepoJob, args: argparse.Namespace, out_dir: Path, ts: str, resolved: list[str]) -> Snapshot:
+    """Reuse a snapshot with the same fingerprint (unless --force), or generate one in-process.
+
+    Each generated snapshot gets a `.fingerprint.json` sidecar listing its reports (with
+    content hashes, so an edited or overwritten report is not reused) and summary.
+    """
+
+    repo_slug = _sanitize_filename(job.name)
+    fp = fingerprint(job, args, resolved)
+    snapshot = None if args.force else find_snapshot(out_dir, repo_slug, fp)
+    if snapshot is None:
+        out_file = snapshot_file(out_dir, repo_slug, job, ts)
+        with tempfile.TemporaryDirectory(prefix="activity-summary-") as tmp:
+            summary_path = Path(tmp) / "summary.json"
+            code = git_activity_report.main(report_args(job, args, out_file, summary_path))
+            if code:
+                raise RuntimeError(f"git_activity_report.py exited with status {code}")
+            snapshot = record_snapshot(out_file, fp, summary_path)
+    if args.latest:
+        update_latest(out_dir, repo_slug, snapshot.reports)
+    return snapshot
+
+
+def record_snapshot(out_file: Path, fp: str, summary_path: Path) -> Snapshot:
+    """The snapshot a report run just wrote (per its --summary), saved with its sidecar."""
+
+    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    # A single report has the label "" and no placeholder, so this holds either way.
+    reports = {w["window"]: Path(str(out_file).replace("{window}", w["window"])) for w in summary["windows"]}
+    sidecar = out_file.parent / (out_file.stem.replace("-{window}", "") + ".fingerprint.json")
+    doc = {
+        "fingerprint": fp,
+        "reports": {label: path.name for label, path in reports.items()},
+        "hashes": {label: _file_hash(path) for label, path in reports.items()},
+        "summary": summary,
+    }
+    sidecar.write_text(json.dumps(doc, indent=2) + "\n", encoding="utf-8")
+    return Snapshot(reports, summary)
+
+
+async def _run(cmd: list[str]) -> tuple[int, str, str]:
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    out, err = await proc.communicate()
+    return proc.returncode or 0, out.decode("utf-8", "replace"), err.decode("utf-8", "replace")
+
+
+def _error_line(text: str) -> str | None:
+    """The line of a subprocess's stderr worth showing.
+
+    That is the first `fatal:`/`error:` line (git, or argparse's `prog: error: ...`), since
+    git follows errors with usage hints; for a Python traceback, its last line (the
+    exception); else the first non-empty line.
+    """
+
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    for line in lines:
+        if line.startswith(("fatal:", "error:")) or ": error: " in line:
+            return line
+    if lines and lines[0].startswith("Traceback"):
+        return lines[-1]
+    return lines[0] if lines else None
+
+
+async def _snapshot_repo(
+    job: RepoJob,
+    args: argparse.Namespace,
+    out_dir: Path,
+    ts: str,
+    limit: asyncio.Semaphore,
+) -> dict:
+    """Snapshot one manifest repo; failures are reported in the result, not raised.
+
+    Everything runs as asyncio subprocesses while holding the concurrency limit: the
+    `git rev-parse` / `git config` lookups, then (unless an identical snapshot is reused)
+    git_activity_report.py, whose git processes and parsing run in that separate process.
+    """
+
+    result: dict = {"name": job.name, "rev": job.rev, "snapshot": None, "error": None}
+    repo_slug = _sanitize_filename(job.name)
+    async with limit:
+        code, out, err = await _run(resolve_command(job))
+        if code != 0:
+            result["error"] = _error_line(err) or f"Not a git repo: {job.repo}"
+            return result
+        top, *resolved = out.splitlines()
+        _, remote, _ = await _run(remote_command(job))
+        resolved.append(f"remote {remote.strip()}")
+        job.repo = Path(top)
+        try:
+            fp = fingerprint(job, args, resolved)
+        except OSError as e:  # unreadable rules or paths file
+            result["error"] = str(e)
+            return result
+        snapshot = None if args.force else find_snapshot(out_dir, repo_slug, fp)
+        if snapshot is None:
+            out_file = snapshot_file(out_dir, repo_slug, job, ts)
+            with tempfile.TemporaryDirectory(prefix="activity-summary-") as tmp:
+                summary_path = Path(tmp) / "summary.json"
+                cmd = [sys.executable, str(_REPORT_SCRIPT), *report_args(job, args, out_file, summary_path)]
+                code, _, err = await _run(cmd)
+                if code != 0:
+                    result["error"] = _error_line(err) or f"git_activity_report.py exited with status {code}"
+                    return result
+                snapshot = record_snapshot(out_file, fp, summary_path)
+    if args.latest:
+        update_latest(out_dir, repo_slug, snapshot.reports)
+    result["snapshot"] = snapshot
+    return result
+
+
+def render_summary(results: list[dict], ts: str) -> str:
+    """Cross-repo Markdown table: one row per repo and window, linking each snapshot."""
+
+    lines = [f"# Git activity across repos ({ts})", ""]
+    lines.append("| Repo | Rev | Window | Commits | Churn | Top area (commits) | Top file (churn) | Report |")
+    lines.append("|---|---|---|---:|---:|---|---|---|")
+    for result in results:
+        name = result["name"]
+        snapshot: Snapshot | None = result["snapshot"]
+        if snapshot is None:
+            lines.append(f"| {name} | `{result['rev']}` | — | — | — | — | — | failed: {result['error']} |")
+            continue
+        rev = f"`{result['rev']}` ({snapshot.summary['head']})"
+        for window in snapshot.summary["windows"]:
+            area = f"{window['top_area']} ({window['top_area_commits']})" if window["top_area"] else "—"
+            top_file = f"`{window['top_file']}` ({window['top_file_churn']})" if window["top_file"] else "—"
+            report = snapshot.reports[window["window"]].name
+            unchanged = " (unchanged)" if snapshot.reused else ""
+            lines.append(
+                f"| {name} | {rev} | {window['title']} | {window['commits']} | {window['churn']} | "
+                f"{area} | {top_file} | [{report}]({report}){unchanged} |"
+            )
+    return "\n".join(lines) + "\n"
+
+
+async def _snapshot_all(jobs: list[RepoJob], args: argparse.Namespace, out_dir: Path, ts: str) -> list[dict]:
+    limit = asyncio.Semaphore(max(1, args.concurrency))
+    return await asyncio.gather(*(_snapshot_repo(job, args, out_dir, ts, limit) for job in jobs))
+
+
+def _print_snapshot(name: str, snapshot: Snapshot) -> None:
+    for path in snapshot.reports.values():
+        print(str(path))
+    if snapshot.reused:
+        print(f"{name}: unchanged since the listed snapshot, not regenerated (--force to redo)", file=sys.stderr)
+
+
+def snapshot_manifest(args: argparse.Namespace) -> int:
+    jobs = load_manifest(Path(args.manifest).expanduser(), args)
+    out_dir = Path(args.out_dir).expanduser()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    ts = datetime.now().strftime("%Y%m%d-%H%M%S")
+
+    results = asyncio.run(_snapshot_all(jobs, args, out_dir, ts))
+
+    summary_file = out_dir / f"summary-activity-{ts}.md"
+    summary_file.write_text(render_summary(results, ts), encoding="utf-8")
+    if args.latest:
+        shutil.copyfile(summary_file, out_dir / "latest-summary.md")
+    for result in results:
+        if result["snapshot"] is not None:
+            _print_snapshot(result["name"], result["snapshot"])
+        else:
+            print(f"{result['name']}: {result['error']}", file=sys.stderr)
+    print(str(summary_file))
+    return 1 if any(result["error"] for result in results) else 0
 
 
 def main(argv: list[str]) -> int:
     ap = argparse.ArgumentParser(description="Snapshot a timestamped git activity report (Markdown).")
     ap.add_argument("--repo", default=".", help="Path to git repo (default: cwd)")
+    ap.add_argument(
+        "--manifest",
+        default=None,
+        help=(
+            "JSON or TOML list of repos (repo, name, rev, n, windows, paths, paths_file, rules) "
+            "to snapshot concurrently instead of --repo; also writes a cross-repo summary."
+        ),
+    )
+    ap.add_argument(
+        "--concurrency",
+        type=int,
+        default=_DEFAULT_CONCURRENCY,
+        help=f"With --manifest, repos snapshotted at once (default: {_DEFAULT_CONCURRENCY}).",
+    )
     ap.add_argument("-n", type=int, default=50, help="Number of commits to analyze (default: 50)")
     ap.add_argument("--rev", default="HEAD", help="Revision/range for git log (default: HEAD)")
+    ap.add_argument(
+        "--windows",
+        default=None,
+        help=(
+            "Comma-separated windows like '50,200,since:v0.6.0' (forwarded; replaces -n). "
+            "Writes one snapshot per window from a single history pass."
+        ),
+    )
     ap.add_argument(
         "--path",
         action="append",
@@ -97,59 +504,70 @@ def main(argv: list[str]) -> int:
         default=0,
         help="If >0, include a table listing the most recent matching commits (forwarded).",
     )
+    ap.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Worker processes for diffing commit shards (forwarded; 0 = one per CPU).",
+    )
+    ap.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for the persistent commit store (forwarded; default: <notes>/.cache).",
+    )
+    ap.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the persistent commit store (forwarded).",
+    )
+    ap.add_argument(
+        "--force",
+        action="store_true",
+        help=(
+            "Generate a new snapshot even if one with the same fingerprint (rev shas, origin "
+            "URL, window, filters, rules, options, script version) already exists in --out-dir."
+        ),
+    )
 
     args = ap.parse_args(argv)
 
+    if args.windows:
+        try:
+            git_activity_report.parse_windows(args.windows)
+        except ValueError as e:
+            ap.error(str(e))
+
+    if args.manifest:
+        return snapshot_manifest(args)
+
     repo = Path(args.repo).expanduser().resolve()
-    repo_root = _git_toplevel(repo)
-    repo_name = _detect_repo_name(repo_root)
+    job = RepoJob(
+        name=repo.name,
+        repo=repo,
+        rev=args.rev,
+        n=args.n,
+        windows=args.windows,
+        paths=args.path,
+        paths_file=_expand(args.paths_file),
+        rules=_expand(args.rules),
+    )
+    # stderr stays separate: warnings (e.g. ambiguous refnames) must not shift the output lines.
+    proc = subprocess.run(resolve_command(job), capture_output=True, text=True, errors="replace")
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr.strip() or f"Not a git repo: {repo}")
+    top, *resolved = proc.stdout.splitlines()
+    remote = subprocess.run(remote_command(job), capture_output=True, text=True, errors="replace")
+    resolved.append(f"remote {remote.stdout.strip()}")
+    job.repo = Path(top)
+    job.name = _detect_repo_name(job.repo)
 
     out_dir = Path(args.out_dir).expanduser()
     # If user gave a relative path, treat it as relative to current working directory.
     out_dir.mkdir(parents=True, exist_ok=True)
 
     ts = datetime.now().strftime("%Y%m%d-%H%M%S")
-    rev_slug = _sanitize_filename(args.rev)
-    repo_slug = _sanitize_filename(repo_name)
-
-    out_file = out_dir / f"{repo_slug}-activity-n{args.n}-{rev_slug}-{ts}.md"
-
-    script_dir = Path(__file__).resolve().parent
-    report_script = script_dir / "git_activity_report.py"
-
-    cmd = [
-        sys.executable,
-        str(report_script),
-        "--repo",
-        str(repo_root),
-        "-n",
-        str(args.n),
-        "--rev",
-        str(args.rev),
-        "--out",
-        str(out_file),
-        "--top",
-        str(args.top),
-        "--top-areas",
-        str(args.top_areas),
-    ]
-    if args.rules:
-        cmd += ["--rules", str(Path(args.rules).expanduser())]
-    if args.paths_file:
-        cmd += ["--paths-file", str(Path(args.paths_file).expanduser())]
-    for p in args.path:
-        if p and str(p).strip():
-            cmd += ["--path", str(p).strip()]
-    if args.show_commits:
-        cmd += ["--show-commits", str(args.show_commits)]
-
-    subprocess.check_call(cmd)
-
-    if args.latest:
-        latest = out_dir / f"latest-{repo_slug}.md"
-        shutil.copyfile(out_file, latest)
-
-    print(str(out_file))
+    _print_snapshot(job.name, snapshot_repo(job, args, out_dir, ts, resolved))
     return 0
 
 
@@ -0,0 +1,112 @@
+"""Tests for git_activity_report.py, run against small throwaway git repos.
+
+  python3 -m pytest vllm/scripts/tests   (or: python3 -m unittest discover vllm/scripts/tests)
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+import unittest.mock
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import git_activity_report  # noqa: E402
+from git_activity_report import (  # noqa: E402
+    ActivityStats,
+    CochangeOptions,
+    Commit,
+    CommitStore,
+    FileChange,
+    file_owners,
+    load_rules,
+)
+
+
+def git(repo: Path, *args: str, author: str = "Alice") -> str:
+    env = {
+        **os.environ,
+        "GIT_AUTHOR_NAME": author,
+        "GIT_AUTHOR_EMAIL": f"{author.lower()}@example.com",
+        "GIT_COMMITTER_NAME": author,
+        "GIT_COMMITTER_EMAIL": f"{author.lower()}@example.com",
+    }
+    return subprocess.check_output(["git", "-C", str(repo), *args], text=True, env=env)
+
+
+class FileOwnersCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.repo = self.root / "repo"
+        self.repo.mkdir()
+        git(self.repo, "init", "-q")
+
+    def test_same_blob_at_two_revs_is_blamed_separately(self) -> None:
+        # Alice writes f.txt, Bob rewrites it, Carol reverts Bob: HEAD has t1's blob again,
+        # but its lines now come from Carol's commit.
+        (self.repo / "f.txt").write_text("one\ntwo\nthree\n")
+        git(self.repo, "add", "f.txt")
+        git(self.repo, "commit", "-qm", "add f", author="Alice")
+        git(self.repo, "tag", "t1")
+        (self.repo / "f.txt").write_text("uno\ndos\ntres\n")
+        git(self.repo, "commit", "-qam", "rewrite f", author="Bob")
+        git(self.repo, "revert", "--no-edit", "HEAD", author="Carol")
+        self.assertEqual(git(self.repo, "rev-parse", "t1:f.txt"), git(self.repo, "rev-parse", "HEAD:f.txt"))
+
+        store = CommitStore.for_repo(self.root / "cache", self.repo)
+        self.addCleanup(store.close)
+        self.assertEqual(file_owners(self.repo, "t1", ["f.txt"], store), {"f.txt": [("Alice", 3)]})
+        self.assertEqual(file_owners(self.repo, "HEAD", ["f.txt"], store), {"f.txt": [("Carol", 3)]})
+        self.assertEqual(file_owners(self.repo, "HEAD", ["f.txt"], None), {"f.txt": [("Carol", 3)]})
+        revs = {rev for (rev,) in store.conn.execute("SELECT DISTINCT rev FROM blame WHERE path = 'f.txt'")}
+        self.assertEqual(len(revs), 2)
+
+
+class CochangeHistoryTest(unittest.TestCase):
+    def commits(self) -> list[Commit]:
+        # A few hot files that usually move in pairs, plus a long tail of one-off files.
+        rng = random.Random(7)
+        hot = [f"vllm/core/hot{i}.py" for i in range(6)]
+        out = []
+        for n in range(300):
+            paths = {hot[n % 6], hot[(n + 1) % 6] if n % 3 else hot[(n + 3) % 6]}
+            paths.update(f"tests/cold{rng.randrange(1000)}.py" for _ in range(rng.randrange(3)))
+            files = tuple(FileChange(path, 1, 1) for path in sorted(paths))
+            out.append(Commit(f"{n:040x}", f"{n:07x}", "2024-01-01", "Alice", f"change {n}", files))
+        return out
+
+    def stats(self, commits: list[Commit]) -> ActivityStats:
+        stats = ActivityStats(load_rules(None), cochange=CochangeOptions())
+        for commit in commits:
+            stats.add_commit(commit)
+        return stats
+
+    def test_folded_history_matches_exact_pairs(self) -> None:
+        commits = self.commits()
+        exact = self.stats(commits)
+        self.assertIsNone(exact.cochange_file_pairs)
+
+        patch = unittest.mock.patch.object
+        with patch(git_activity_report, "_COCHANGE_HISTORY", 50), patch(git_activity_report, "_COCHANGE_POOL", 20):
+            folded = self.stats(commits)
+            shards = [self.stats(commits[i : i + 100]) for i in range(0, 300, 100)]
+            merged = shards[0]
+            for shard in shards[1:]:
+                merged.merge(shard)
+        self.assertIsNotNone(folded.cochange_file_pairs)
+        self.assertEqual(folded.cochange_files, [])
+        self.assertLessEqual(len(folded.cochange_pool), 20)
+        self.assertTrue(exact.coupled_files(6))
+        self.assertEqual(folded.coupled_files(6), exact.coupled_files(6))
+        self.assertEqual(merged.coupled_files(6), exact.coupled_files(6))
+
+
+if __name__ == "__main__":
+    unittest.main()
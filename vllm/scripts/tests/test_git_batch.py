@@ -0,0 +1,47 @@
+"""Tests for git_batch.py, run against a small throwaway git repo."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from git_batch import GitBatch  # noqa: E402
+
+
+class GitBatchTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.repo = Path(tmp.name)
+        env = {**os.environ, "GIT_AUTHOR_NAME": "A", "GIT_AUTHOR_EMAIL": "a@example.com",
+               "GIT_COMMITTER_NAME": "A", "GIT_COMMITTER_EMAIL": "a@example.com"}  # fmt: skip
+        (self.repo / "f.txt").write_text("hello\n")
+        for args in (["init", "-q"], ["add", "f.txt"], ["commit", "-qm", "add f"]):
+            subprocess.check_call(["git", "-C", str(self.repo), *args], env=env)
+        self.git = GitBatch(self.repo)
+        self.addCleanup(self.git.close)
+
+    def test_missing_path_with_a_space(self) -> None:
+        # git echoes the name: "HEAD:a b missing" has three fields, like a real header.
+        self.assertEqual(self.git.sizes("HEAD", ["f.txt", "a b", "c d e"]), {"f.txt": 6})
+        self.assertEqual(self.git.info(["HEAD:a b"]), [None])
+        with self.assertRaises(RuntimeError):
+            self.git.blob("HEAD:a b")
+        # The stream is still in step afterwards.
+        self.assertEqual(self.git.blob("HEAD:f.txt"), b"hello\n")
+
+    def test_early_exit_drains_missing_replies(self) -> None:
+        blobs = self.git.iter_blobs(["HEAD:f.txt", "HEAD:x y", "HEAD:f.txt"])
+        self.assertEqual(next(blobs), b"hello\n")
+        blobs.close()
+        self.assertEqual(self.git.blob("HEAD:f.txt"), b"hello\n")
+
+
+if __name__ == "__main__":
+    unittest.main()